@@ -1,8 +1,10 @@
 """ Default ADRest form for Django models. """
+from django.core.exceptions import ValidationError
 from django.db.models import Model
 from django.db.models.fields import AutoField
 from django.db.models.fields.related import ManyToManyField
-from django.forms.models import ModelForm
+from django.forms.models import ModelForm, fields_for_model
+from django.forms.util import ErrorDict, ErrorList
 
 
 class PartitialForm(ModelForm):
@@ -40,4 +42,135 @@ class PartitialForm(ModelForm):
         return dict(item for item in gen if not item[1] is None)
 
 
+class ModelValidator(object):
+
+    """ Lightweight replacement of `PartitialForm` for JSON payloads.
+
+    Form fields are created once by `compile_validator`, so validation
+    doesn't copy fields and doesn't read initial values from instance.
+    Only given values (and defaults for new instances) are cleaned.
+
+    Validator has interface of a form: `is_valid`, `errors`,
+    `cleaned_data` and `save`.
+
+    """
+
+    model = None
+
+    #: Form fields by names
+    fields = dict()
+
+    #: Tuple of (name, model field, form field)
+    schema = ()
+
+    def __init__(self, data=None, instance=None, **resources):
+        self.data, self.instance = data or dict(), instance
+        self.resources = resources
+        self.cleaned_data, self._errors = dict(), None
+
+    @property
+    def errors(self):
+        " Validate the data and return errors. "
+
+        if self._errors is None:
+            self.full_clean()
+        return self._errors
+
+    def is_valid(self):
+        " Return True if the data is valid. "
+
+        return not self.errors
+
+    def full_clean(self):
+        " Clean the data. "
+
+        self._errors = ErrorDict()
+        for name, field, formfield in self.schema:
+
+            if name in self.resources:
+                value = self.resources[name]
+                if isinstance(value, Model):
+                    value = value.pk
+
+            elif name in self.data:
+                value = self.data.getlist(name) if isinstance(
+                    field, ManyToManyField) and hasattr(
+                        self.data, 'getlist') else self.data[name]
+
+            elif self.instance is None:
+                value = field.get_default()
+
+            else:
+                continue
+
+            try:
+                self.cleaned_data[name] = formfield.clean(value)
+            except ValidationError, e:
+                self._errors[name] = ErrorList(e.messages)
+
+        if not self._errors:
+            self.instance = self.construct_instance()
+            unique = set(name for name, field, _ in self.schema
+                         if name in self.cleaned_data and field.unique)
+            for together in self.model._meta.unique_together:
+                if set(together) & set(self.cleaned_data):
+                    unique.update(together)
+
+            if unique:
+                try:
+                    self.instance.validate_unique(exclude=[
+                        f.name for f in self.model._meta.fields
+                        if not f.name in unique])
+                except ValidationError, e:
+                    self._errors.update((k, ErrorList(v))
+                                        for k, v in e.message_dict.items())
+
+    def construct_instance(self):
+        " Apply the cleaned data to instance. "
+
+        instance = self.instance or self.model()
+        for name, field, _ in self.schema:
+            if name in self.cleaned_data and \
+                    not isinstance(field, ManyToManyField):
+                field.save_form_data(instance, self.cleaned_data[name])
+        return instance
+
+    def save(self, commit=True):
+        """ Save the instance.
+
+        :return Model: instance
+
+        """
+        if self.errors:
+            raise ValueError("The validator's data didn't validate.")
+
+        if commit:
+            self.instance.save()
+            for name, field, _ in self.schema:
+                if name in self.cleaned_data and \
+                        isinstance(field, ManyToManyField):
+                    field.save_form_data(
+                        self.instance, self.cleaned_data[name])
+
+        return self.instance
+
+
+def compile_validator(model, fields=None, exclude=None):
+    """ Create validator for the model.
+
+    :return ModelValidator: validator class
+
+    """
+    formfields = dict(
+        (k, v) for k, v in fields_for_model(
+            model, fields=fields, exclude=exclude).items() if v)
+    schema = tuple(
+        (f.name, f, formfields[f.name])
+        for f in model._meta.fields + model._meta.many_to_many
+        if f.name in formfields)
+
+    return type('%sValidator' % model.__name__, (ModelValidator,), dict(
+        model=model, fields=formfields, schema=schema))
+
+
 # lint_ignore=W0212,R0924
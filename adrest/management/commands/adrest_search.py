@@ -0,0 +1,23 @@
+""" Create tables of full-text search indexes. """
+from django.conf import settings
+from django.core.management.base import NoArgsCommand
+from django.db import connections, router
+from django.utils.importlib import import_module
+
+from ...utils.search import INDEXES
+
+
+class Command(NoArgsCommand):
+
+    """ Create and fill tables of search backends for resources. """
+
+    help = "Create tables of full-text search indexes for resources."
+
+    def handle_noargs(self, **options):
+        # Load resources with search backends
+        import_module(settings.ROOT_URLCONF)
+
+        for backend in INDEXES:
+            connection = connections[router.db_for_write(backend.model)]
+            if backend.ensure_table(connection):
+                self.stdout.write("Created index %s\n" % backend.table)
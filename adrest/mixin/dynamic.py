@@ -1,17 +1,20 @@
 """ Filters and sorting support. """
-from django.core.exceptions import FieldError
-from logging import getLogger
+from django.conf import settings
+from django.db.models.query import QuerySet
 
 from ..settings import ADREST_CONFIG
-from ..utils import UpdatedList
+from ..utils import UpdatedList, status
+from ..utils.cache import CachedCollection, watch
+from ..utils.exceptions import HttpError
+from ..utils.filters import (
+    LOOKUP_SEP, INDEXED, compile_schema, parse_filter, compile_allowed,
+    check_plan)
 from ..utils.meta import MixinBaseMeta, MixinBase
-from ..utils.paginator import Paginator
-
-
-logger = getLogger('django.request')
-
-# Separator used to split filter strings apart.
-LOOKUP_SEP = '__'
+from ..utils.paginator import Paginator, CursorPaginator
+from ..utils.tools import as_tuple, import_functions
+from ..utils.transformers import SmartTransformer
+from ..utils.where import parse_where, compile_where
+from .transformer import TransformerMixin
 
 
 class Meta:
@@ -36,10 +39,46 @@ class Meta:
     #: it with `?max=...`
     limit_per_page = ADREST_CONFIG['LIMIT_PER_PAGE']
 
+    #: Pagination mode: 'page' (by page numbers) or 'cursor' (by signed
+    #: cursors, without counting and offsets). Cursor pagination is used
+    #: for querysets only.
+    pagination = 'page'
+
     #: Define queryset for resource's operation.
     #: By default: self.Meta.model.objects.all()
     queryset = None
 
+    #: Fields allowed for filtering (tuple of names or lookup paths as
+    #: 'author__name'). Set to 'indexed' for allow only lookups which could
+    #: use indexes on indexed fields. By default all fields are allowed.
+    #: Query plans of 'indexed' collections are checked for sequential scans
+    #: in debug mode.
+    filterable = None
+
+    #: Fields allowed for sorting (tuple of names or 'indexed').
+    #: By default all fields are allowed.
+    sortable = None
+
+    #: Fields for full-text search by `adr-q` param
+    search_fields = None
+
+    #: Search backend (class or import path).
+    #: By default: ADREST_CONFIG['SEARCH_BACKEND']
+    search_backend = None
+
+    #: Cache count and primary keys of collection's pages.
+    #: Set timeout in seconds or `True` for default cache timeout.
+    #: Cached data is invalidated when the resource's model or related
+    #: models used by filters and sorting are changed. Changes made without
+    #: model's signals (`QuerySet.update`, raw SQL) are not tracked.
+    collection_cache = None
+
+    #: Relations for `select_related` and `prefetch_related` in collections.
+    #: Relations serialized by `emit_related` and `emit_include` options
+    #: are added automatically.
+    select_related = None
+    prefetch_related = None
+
 
 class DynamicMixinMeta(MixinBaseMeta):
 
@@ -52,9 +91,36 @@ class DynamicMixinMeta(MixinBaseMeta):
         if not cls._meta.dyn_prefix:
             raise AssertionError("Resource.Meta.dyn_prefix should be defined.")
 
+        if not cls._meta.pagination in ('page', 'cursor'):
+            raise AssertionError(
+                "Resource.Meta.pagination should be 'page' or 'cursor'.")
+
         if cls._meta.model and cls._meta.queryset is None:
             cls._meta.queryset = cls._meta.model.objects.all()
 
+        # Compile filters
+        cls._meta.filter_schema = cls._meta.model and compile_schema(
+            cls._meta.model)
+
+        # Compile restrictions of filters and sorting
+        cls._meta.allowed_filters = cls._meta.model and compile_allowed(
+            cls._meta.model, cls._meta.filterable)
+        cls._meta.allowed_sorting = cls._meta.model and compile_allowed(
+            cls._meta.model, cls._meta.sortable)
+
+        # Prepare search backend
+        cls._meta.search = None
+        if cls._meta.model and cls._meta.search_fields:
+            backend = cls._meta.search_backend or \
+                ADREST_CONFIG['SEARCH_BACKEND']
+            if isinstance(backend, basestring):
+                backend = import_functions([backend])[0]
+            cls._meta.search = backend(
+                cls._meta.model, as_tuple(cls._meta.search_fields))
+
+        if cls._meta.model and cls._meta.collection_cache:
+            watch(cls._meta.model)
+
         return cls
 
 
@@ -71,13 +137,18 @@ class DynamicMixin(MixinBase):
 
     Meta = Meta
 
-    def __init__(self, *args, **kwargs):
-        """ Copy self queryset for prevent query caching. """
+    def get_queryset(self):
+        """ Get queryset for the resource's operations. `Meta.queryset` is
+        shared by all requests, so a fresh copy is returned on every call.
+        Redefine it for per-request restrictions.
 
-        super(DynamicMixin, self).__init__(*args, **kwargs)
+        :return QuerySet: queryset or None
 
-        if not self._meta.queryset is None:
-            self._meta.queryset = self._meta.queryset.all()
+        """
+        if self._meta.queryset is None:
+            return None
+
+        return self._meta.queryset.all()
 
     def get_collection(self, request, **resources):
         """ Get filters and return filtered result.
@@ -86,27 +157,63 @@ class DynamicMixin(MixinBase):
 
         """
 
-        if self._meta.queryset is None:
+        qs = self.get_queryset()
+        if qs is None:
             return []
 
         # Filter collection
         filters = self.get_filters(request, **resources)
+        dynamic = bool(filters)
         filters.update(self.get_default_filters(**resources))
-        qs = self._meta.queryset
-        for key, (value, exclude) in filters.items():
-            try:
-                if exclude:
-                    qs = qs.exclude(**{key: value})
+        for key, (value, exclude) in sorted(filters.items()):
+            if exclude:
+                qs = qs.exclude(**{key: value})
+
+            else:
+                qs = qs.filter(**{key: value})
+
+        where = self.get_where(request)
+        if where:
+            dynamic = True
+            qs = qs.filter(where)
 
-                else:
-                    qs = qs.filter(**{key: value})
-            except FieldError, e:
-                logger.warning(e)
+        # Full-text search
+        query = self._meta.search and request.GET.get(
+            self._meta.dyn_prefix + 'q')
+        if query:
+            qs = self._meta.search.search(qs, query)
 
         sorting = self.get_sorting(request, **resources)
         if sorting:
             qs = qs.order_by(*sorting)
 
+        # Look for sequential scans in debug mode
+        if settings.DEBUG and (dynamic or sorting) and INDEXED in (
+                self._meta.filterable, self._meta.sortable):
+            check_plan(qs)
+
+        fieldset = self.get_fieldset(request)
+        select_related, prefetch_related = [
+            [l for l in lookups or ()
+             if not fieldset or l.split(LOOKUP_SEP)[0] in fieldset]
+            for lookups in (
+                self._meta.select_related, self._meta.prefetch_related)]
+
+        if select_related:
+            qs = qs.select_related(*select_related)
+
+        if prefetch_related:
+            qs = qs.prefetch_related(*prefetch_related)
+
+        projection = self.get_projection(request)
+        if projection:
+            qs = qs.only(*projection)
+
+        if self._meta.collection_cache:
+            return CachedCollection(qs, timeout=(
+                None if self._meta.collection_cache is True
+                else self._meta.collection_cache))
+
         return qs
 
     def get_default_filters(self, **resources):
@@ -121,6 +228,10 @@ class DynamicMixin(MixinBase):
     def get_filters(self, request, **resources):
         """ Make filters from GET variables.
 
+        Filters are parsed by the schema compiled for the resource's model
+        (`Meta.filter_schema`), invalid filters are rejected with
+        `HttpError`.
+
         :return dict: filters
 
         """
@@ -129,30 +240,84 @@ class DynamicMixin(MixinBase):
         if not self._meta.fields:
             return filters
 
-        for field in request.GET.iterkeys():
-            tokens = field.split(LOOKUP_SEP)
-            field_name = tokens[0]
-
-            if not field_name in self._meta.fields:
+        for key in request.GET.iterkeys():
+            if not key.split(LOOKUP_SEP, 1)[0] in self._meta.fields:
                 continue
 
-            exclude = False
-            if tokens[-1] == 'not':
-                exclude = True
-                tokens.pop()
+            path, value, exclude = parse_filter(
+                self._meta.filter_schema, self._meta.model, key,
+                request.GET.getlist(key), allowed=self._meta.allowed_filters)
+            filters[path] = (value, exclude)
 
-            converter = self._meta.model._meta.get_field(
-                field_name).to_python if len(tokens) == 1 else lambda v: v
-            value = map(converter, request.GET.getlist(field))
+        return filters
 
-            if len(value) > 1:
-                tokens.append('in')
-            else:
-                value = value.pop()
+    def get_where(self, request):
+        """ Make query from filter expression
+        (`?adr-where=(name:Bill|name:John);id:[1,10)`).
 
-            filters[LOOKUP_SEP.join(tokens)] = (value, exclude)
+        Expression's filters are validated as filters from GET variables.
+        See `adrest.utils.where` for syntax.
 
-        return filters
+        :return Q: query or None
+
+        """
+        source = request and self._meta.fields and request.GET.get(
+            self._meta.dyn_prefix + 'where')
+        if not source:
+            return None
+
+        return compile_where(
+            parse_where(source), self._meta.filter_schema, self._meta.model,
+            allowed=self._meta.allowed_filters)
+
+    def get_fieldset(self, request):
+        """ Get names of fields requested by client
+        (`?adr-fields=title,author`).
+
+        :return frozenset: names of fields or None
+
+        """
+        if not request:
+            return None
+
+        names = frozenset(
+            name.strip()
+            for value in request.GET.getlist(self._meta.dyn_prefix + 'fields')
+            for name in value.split(','))
+        return (names - set([''])) or None
+
+    def get_projection(self, request):
+        """ Get model's fields which should be loaded for the requested
+        fieldset. Projection is used only when the fieldset consists of
+        model's fields, the resource is serialized by `SmartTransformer`
+        and has no custom serialization (`to_simple`, `to_simple__<field>`,
+        model's `to_simple`) which could read others.
+
+        :return list: names of fields or None
+
+        """
+        fieldset = self.get_fieldset(request)
+        if not fieldset or not self._meta.fields or \
+                not fieldset <= self._meta.fields:
+            return None
+
+        transformers = self._meta.transformers
+        if not transformers or not issubclass(
+                transformers[0], SmartTransformer):
+            return None
+
+        if hasattr(self._meta.model, 'to_simple'):
+            return None
+
+        to_simple = getattr(type(self), 'to_simple', None)
+        if to_simple and getattr(to_simple, 'im_func', to_simple) is not \
+                TransformerMixin.to_simple:
+            return None
+
+        if [f for f in fieldset if hasattr(self, 'to_simple__' + f)]:
+            return None
+
+        return sorted(fieldset)
 
     def get_sorting(self, request, **resources):
         """ Get sorting options.
@@ -166,7 +331,17 @@ class DynamicMixin(MixinBase):
             return sorting
 
         prefix = self._meta.dyn_prefix + 'sort'
-        return request.GET.getlist(prefix)
+        sorting = request.GET.getlist(prefix)
+
+        allowed = self._meta.allowed_sorting
+        if allowed:
+            for name in sorting:
+                if not name.lstrip('-') in allowed[0]:
+                    raise HttpError(
+                        "Sorting is not allowed: %s" % name,
+                        status=status.HTTP_400_BAD_REQUEST)
+
+        return sorting
 
     def paginate(self, request, collection):
         """ Paginate collection.
@@ -174,5 +349,10 @@ class DynamicMixin(MixinBase):
         :return object: Collection or paginator
 
         """
-        p = Paginator(request, self, collection)
+        paginator = Paginator
+        if self._meta.pagination == 'cursor' and \
+                isinstance(collection, QuerySet):
+            paginator = CursorPaginator
+
+        p = paginator(request, self, collection)
         return p.paginator and p or UpdatedList(collection)
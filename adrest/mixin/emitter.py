@@ -1,7 +1,13 @@
 """ ADRest serialization support. """
 import mimeparse
 from django.http import HttpResponse
+try:
+    from django.http import StreamingHttpResponse
+except ImportError: # django < 1.5
+    StreamingHttpResponse = HttpResponse
+from django.utils.cache import patch_vary_headers
 
+from ..utils.compress import negotiate, compress, compress_sequence
 from ..utils.emitter import JSONEmitter, BaseEmitter
 from ..utils.meta import MixinBaseMeta
 from ..utils.paginator import Paginator
@@ -50,6 +56,16 @@ class Meta:
     #: (or resource.Meta.model)
     emit_template = None
 
+    #: Compress responses by gzip (or brotli when it is installed)
+    #: if client accepts that. Responses are compressed by `compress` at the
+    #: end of `ResourceView.dispatch`, after logging and caching.
+    emit_compress = False
+
+    #: Don't compress responses shorter than the size (bytes)
+    emit_compress_min_size = 200
+
+    #: Compression level
+    emit_compress_level = 6
 
 
 
@@ -110,10 +126,9 @@ class EmitterMixin(object):
         :return response: Instance of django.http.Response
 
         """
-        if isinstance(content, HttpResponse):
+        if isinstance(content, (HttpResponse, StreamingHttpResponse)):
             return content
 
-
         # Get emitter for request
         emitter = emitter or self.determine_emitter(request)
         emitter = emitter(self, request=request, response=content)
@@ -137,6 +152,56 @@ class EmitterMixin(object):
 
         return response
 
+    def compress(self, response, request=None):
+        """ Compress response by encoding accepted by client.
+
+        :return response: Instance of django.http.Response
+
+        """
+        if not self._meta.emit_compress or request is None or \
+                response.has_header('Content-Encoding'):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        encoding = self.determine_encoding(request)
+        if not encoding:
+            return response
+
+        level = self._meta.emit_compress_level
+
+        if getattr(response, 'streaming', False):
+            response.streaming_content = compress_sequence(
+                encoding, response.streaming_content, level)
+            if response.has_header('Content-Length'):
+                del response['Content-Length']
+
+        else:
+            if len(response.content) < self._meta.emit_compress_min_size:
+                return response
+
+            content = compress(encoding, response.content, level)
+            if len(content) >= len(response.content):
+                return response
+
+            response.content = content
+            response['Content-Length'] = str(len(content))
+
+        response['Content-Encoding'] = encoding
+        return response
+
+    @classmethod
+    def determine_encoding(cls, request):
+        """ Get content encoding for request.
+
+        :return str: encoding or None
+
+        """
+        if not cls._meta.emit_compress or not request:
+            return None
+
+        return negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+
 
     @classmethod
     def determine_emitter(cls, request):
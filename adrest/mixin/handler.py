@@ -1,14 +1,28 @@
 """ Implement REST functionality. """
-from django.core.exceptions import ObjectDoesNotExist, MultipleObjectsReturned
+import hashlib
+from calendar import timegm
+
+from django.core.exceptions import (
+    ObjectDoesNotExist, MultipleObjectsReturned, FieldError)
+from django.db.models.fields import FieldDoesNotExist
+from django.db.models import Count, Max, Model, FileField
+from django.db.models.query import QuerySet
+try:
+    from django.db.transaction import atomic
+except ImportError:  # Django < 1.6
+    from django.db.transaction import commit_on_success as atomic
 from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.http import parse_etags, parse_http_date_safe
 from logging import getLogger
 
-from ..forms import PartitialForm
+from ..forms import PartitialForm, compile_validator
 from ..settings import ADREST_CONFIG
 from ..utils import status, UpdatedList
+from ..utils.cache import CachedCollection, bump_generation
 from ..utils.exceptions import HttpError, FormError
 from ..utils.tools import as_tuple
-from .dynamic import DynamicMixin, DynamicMixinMeta
+from .dynamic import DynamicMixin, DynamicMixinMeta, LOOKUP_SEP
 
 
 __all__ = 'HandlerMixin',
@@ -48,9 +62,41 @@ class Meta:
     #: Exclude field's names for automatic a model form
     form_exclude = None
 
+    #: Use compiled validator (`adrest.forms.ModelValidator`) instead of
+    #: the automatic model form. Validator is faster but doesn't support
+    #: form's features (as custom `clean` methods).
+    validator = False
+
     #: Specify for parent relations name
     parent_relation_name = None
 
+    #: Create instances from POSTed lists by `bulk_create`. Signals are
+    #: not sent and primary keys are not returned (on most databases).
+    #: By default instances are saved one by one in one transaction.
+    bulk_create = False
+
+    #: Size of chunks for `bulk_create` when POST data is a list
+    bulk_chunk_size = 500
+
+    #: Update collections by one `UPDATE` query (PUT/PATCH). Model's
+    #: `save` and signals are skipped, enable it only when they don't matter.
+    bulk_update = False
+
+    #: Maximum of rows deleted by one DELETE request (None is unlimited)
+    bulk_delete_max = None
+
+    #: Enable conditional GET with ETag validator.
+    #: Set to `True` for validator derived from model or define a function
+    #: `etag(resource, request, **resources)` which returns a string.
+    #: Model-derived ETag of collections requires `last_modified` field.
+    etag = None
+
+    #: Enable conditional GET with Last-Modified validator.
+    #: Set a name of model's datetime field (MAX of the field will be used
+    #: for collections) or define a function
+    #: `last_modified(resource, request, **resources)` which returns datetime.
+    last_modified = None
+
 
 class HandlerMeta(DynamicMixinMeta):
 
@@ -64,13 +110,26 @@ class HandlerMeta(DynamicMixinMeta):
         cls._meta.allowed_methods = mcs.__prepare_methods(
             cls._meta.allowed_methods)
 
+        # Prepare lookups to parents
+        cls._meta.relations = list(mcs.__prepare_relations(cls))
+
         if not cls._meta.model:
             return cls
 
         cls._meta.name = cls._meta.name or cls._meta.model._meta.module_name
 
+        if isinstance(cls._meta.last_modified, basestring) and \
+                not cls._meta.last_modified in cls._meta.fields:
+            raise AssertionError(
+                "Meta.last_modified should be a field of the model.")
+
         # Create form if not exist
-        if not cls._meta.form:
+        if not cls._meta.form and cls._meta.validator:
+            cls._meta.form = compile_validator(
+                cls._meta.model, fields=cls._meta.form_fields,
+                exclude=cls._meta.form_exclude)
+
+        elif not cls._meta.form:
 
             class DynForm(PartitialForm):
 
@@ -83,6 +142,31 @@ class HandlerMeta(DynamicMixinMeta):
 
         return cls
 
+    @staticmethod
+    def __prepare_relations(cls):
+        """ Generate pairs (parent, lookup from the resource's model to
+        the parent's model) while relations could be derived from models.
+
+        """
+        path, resource = [], cls
+        while resource._meta.parent:
+            parent = resource._meta.parent
+            if not resource._meta.model or not parent._meta.model:
+                return
+
+            name = resource._meta.parent_relation_name or parent._meta.name
+            try:
+                field = resource._meta.model._meta.get_field(name)
+            except FieldDoesNotExist:
+                return
+
+            if not field.rel or field.rel.to is not parent._meta.model:
+                return
+
+            path.append(name)
+            yield parent, LOOKUP_SEP.join(path)
+            resource = parent
+
     @staticmethod
     def __prepare_methods(methods):
 
@@ -144,15 +228,24 @@ class HandlerMixin(DynamicMixin):
         # Get function data
         return view(request, **resources)
 
-    @staticmethod
-    def head(*args, **kwargs):
-        """ Just return empty response.
+    def head(self, request, **resources):
+        """ Default HEAD method. Resolve resources like GET without
+        serialization. Collections are counted in `X-Total-Count` header.
 
         :return django.http.Response: empty response.
 
         """
+        response = HttpResponse()
 
-        return HttpResponse()
+        content = resources.get(self._meta.name)
+        if content is None and \
+                type(self).get.im_func is HandlerMixin.get.im_func:
+            content = self.get_collection(request, **resources)
+
+        if isinstance(content, (QuerySet, CachedCollection)):
+            response['X-Total-Count'] = content.count()
+
+        return response
 
     def get(self, request, **resources):
         """ Default GET method. Return instance (collection) by model.
@@ -177,12 +270,63 @@ class HandlerMixin(DynamicMixin):
         if not self._meta.form:
             return None
 
+        if isinstance(request.data, (list, tuple)):
+            return self.post_list(request, **resources)
+
         form = self._meta.form(request.data, **resources)
         if form.is_valid():
             return form.save()
 
         raise FormError(form)
 
+    def post_list(self, request, **resources):
+        """ Create instances from a list of items. Every item is validated
+        by the handler's form, nothing is created if any item is invalid.
+        Instances are saved in one transaction.
+
+        With `Meta.bulk_create` instances are created by `bulk_create` in
+        chunks of `Meta.bulk_chunk_size` (models with many-to-many fields,
+        multi-table inheritance or search index are still saved one by
+        one).
+
+        :return UpdatedList: created instances or raise error with
+            per-item errors (indexes of items in list)
+
+        """
+        forms, errors = [], dict()
+        for index, item in enumerate(request.data):
+            form = self._meta.form(
+                item if isinstance(item, dict) else dict(), **resources)
+            if form.is_valid():
+                forms.append(form)
+            else:
+                errors[index] = form.errors
+
+        if errors:
+            raise HttpError(
+                dict(errors=errors), status=status.HTTP_400_BAD_REQUEST)
+
+        model = self._meta.model
+        created = UpdatedList()
+        if not forms:
+            return created
+
+        with atomic():
+            if not self._meta.bulk_create or model._meta.parents or [
+                    f for f in model._meta.many_to_many
+                    if f.name in forms[0].fields] or \
+                    self._meta.search and self._meta.search.indexed:
+                created.extend(form.save() for form in forms)
+
+            else:
+                created.extend(form.save(commit=False) for form in forms)
+                size = self._meta.bulk_chunk_size or len(created)
+                for start in range(0, len(created), size):
+                    model.objects.bulk_create(created[start:start + size])
+                bump_generation(model)
+
+        return created
+
     def put(self, request, **resources):
         """ Default PUT method. Uses self form. Allow bulk update.
 
@@ -197,33 +341,164 @@ class HandlerMixin(DynamicMixin):
                 "Resource not found.", status=status.HTTP_404_NOT_FOUND)
         resource = resources.pop(self._meta.name)
 
+        if self._meta.bulk_update and isinstance(resource, QuerySet):
+            updated = self.put_bulk(request, resource, **resources)
+            if not updated is None:
+                return updated
+
         updated = UpdatedList()
-        for o in as_tuple(resource):
-            form = self._meta.form(data=request.data, instance=o, **resources)
+        with atomic():
+            for o in as_tuple(resource):
+                form = self._meta.form(
+                    data=request.data, instance=o, **resources)
 
-            if not form.is_valid():
-                raise FormError(form)
+                if not form.is_valid():
+                    raise FormError(form)
 
-            updated.append(form.save())
+                updated.append(form.save())
 
         return updated if len(updated) > 1 else updated[-1]
 
+    def put_bulk(self, request, queryset, **resources):
+        """ Update collection by one query. Data is validated once by
+        the handler's form (bound to the first instance), only fields
+        given in request are updated. Unique fields are updated by saving
+        instances one by one.
+
+        :return UpdatedList: changed instances, raise form's error or
+            return None when the data can't be applied by one query
+
+        """
+        objects = list(queryset)
+        form = self._meta.form(
+            data=request.data, instance=objects[0], **resources)
+
+        if not form.is_valid():
+            raise FormError(form)
+
+        opts = self._meta.model._meta
+        fields = [
+            f for f in opts.fields
+            if f.name in form.cleaned_data and f.name in request.data]
+
+        if [f for f in opts.many_to_many if f.name in request.data] or \
+                [f for f in fields if isinstance(f, FileField)]:
+            return None
+
+        # Unique values are validated for every instance
+        unique = set(name for names in opts.unique_together for name in names)
+        if len(objects) > 1 and \
+                [f for f in fields if f.unique or f.name in unique]:
+            return None
+
+        # Search index is updated by signals
+        search = self._meta.search
+        if search and search.indexed and \
+                [f for f in fields if f.name in search.fields]:
+            return None
+
+        values = dict((f.name, form.cleaned_data[f.name]) for f in fields)
+
+        now = timezone.now()
+        for f in opts.fields:
+            if getattr(f, 'auto_now', False):
+                values[f.name] = now
+
+        if values:
+            with atomic():
+                self._meta.model.objects.filter(
+                    pk__in=[o.pk for o in objects]).update(**values)
+            bump_generation(self._meta.model)
+
+        for o in objects:
+            for name, value in values.iteritems():
+                setattr(o, name, value)
+
+        return UpdatedList(objects)
+
     def delete(self, request, **resources):
         """ Default DELETE method. Allow bulk delete.
 
+        Collections are deleted by one `queryset.delete()` call. Without
+        resource's primary keys the collection is selected by filters
+        from query string (`DELETE /author/1/book/?status=draft`).
+
         :return django.http.response: empty response
 
         """
 
         resource = resources.get(self._meta.name)
-        if not resource:
+        if resource is None:
+            resource = self.get_delete_collection(request, **resources)
+            if resource is not None:
+                resources[self._meta.name] = resource
+                self.check_delete_collection(request, **resources)
+
+        if resource is None or \
+                not isinstance(resource, QuerySet) and not resource:
             raise HttpError("Bad request", status=status.HTTP_404_NOT_FOUND)
 
-        for o in as_tuple(resource):
-            o.delete()
+        if self._meta.bulk_delete_max and isinstance(resource, QuerySet) \
+                and resource.count() > self._meta.bulk_delete_max:
+            raise HttpError(
+                "Too many resources to delete (max %s)." %
+                self._meta.bulk_delete_max,
+                status=status.HTTP_400_BAD_REQUEST)
+
+        if isinstance(resource, (QuerySet, Model)):
+            resource.delete()
+
+        else:
+            for o in as_tuple(resource):
+                o.delete()
 
         return HttpResponse("")
 
+    def check_delete_collection(self, request, **resources):
+        """ Check owners and rights for the collection selected by filters.
+        Resources are checked in dispatch before the collection is known.
+
+        :return bool: True or raise HttpError
+
+        """
+        stages = self._meta.stages or ()
+
+        if 'check_owners' in stages:
+            self.check_owners(request, **resources)
+
+        if 'check_rights' in stages:
+            self.check_rights(resources, request=request)
+
+        return True
+
+    def get_delete_collection(self, request, **resources):
+        """ Filter collection for bulk delete. Unlike `get_collection`
+        unknown lookups are errors here.
+
+        :return QuerySet: collection or None when query has no filters
+
+        """
+        qs = self.get_queryset()
+        filters = self.get_filters(request, **resources)
+        where = self.get_where(request)
+        if qs is None or not filters and not where:
+            return None
+
+        filters.update(self.get_default_filters(**resources))
+        if where:
+            qs = qs.filter(where)
+
+        try:
+            for key, (value, exclude) in filters.items():
+                qs = qs.exclude(**{key: value}) if exclude else \
+                    qs.filter(**{key: value})
+
+        except (FieldError, ValueError), e:
+            raise HttpError(
+                "Invalid filter: %s" % e, status=status.HTTP_400_BAD_REQUEST)
+
+        return qs
+
     def patch(self, request, **resources):
         """ Default PATCH method.
 
@@ -242,6 +517,76 @@ class HandlerMixin(DynamicMixin):
 
         return HttpResponse("OK")
 
+    def get_validators(self, request, **resources):
+        """ Calculate validators for conditional GET.
+
+        Model-derived validators are calculated from the resource's instance
+        or with one aggregate query over the filtered collection.
+
+        :return tuple: (etag, last_modified)
+
+        """
+        etag, last_modified = self._meta.etag, self._meta.last_modified
+
+        if callable(etag):
+            etag = etag(self, request, **resources)
+
+        if callable(last_modified):
+            last_modified = last_modified(self, request, **resources)
+
+        field = isinstance(last_modified, basestring) and last_modified
+        if etag is not True and not field:
+            return etag, last_modified
+
+        content = resources.get(self._meta.name)
+        if content is None:
+            content = self.get_collection(request, **resources)
+
+        if isinstance(content, CachedCollection):
+            content = content.queryset
+
+        bits = [str(self._meta.model._meta), request.META.get('HTTP_ACCEPT')]
+
+        if isinstance(content, Model):
+            if field:
+                last_modified = getattr(content, field)
+            bits += [f.value_to_string(content)
+                     for f in content._meta.fields]
+
+        elif isinstance(content, QuerySet):
+            if field:
+                aggregate = content.aggregate(
+                    count=Count('pk'), last_modified=Max(field))
+                last_modified = aggregate['last_modified']
+                bits += [aggregate['count'], last_modified]
+            else:
+                etag = None
+
+        else:
+            etag = last_modified = None
+
+        if etag is True:
+            etag = hashlib.md5(
+                ':'.join(map(unicode, bits)).encode('utf-8')).hexdigest()
+
+        return etag, last_modified
+
+    @staticmethod
+    def is_not_modified(request, etag=None, last_modified=None):
+        """ Check request's conditional headers.
+
+        :return bool: True if client has the actual content
+
+        """
+        if etag and 'HTTP_IF_NONE_MATCH' in request.META:
+            etags = parse_etags(request.META['HTTP_IF_NONE_MATCH'])
+            return etag in etags or '*' in etags
+
+        since = parse_http_date_safe(
+            request.META.get('HTTP_IF_MODIFIED_SINCE'))
+        return bool(since and last_modified and
+                    timegm(last_modified.utctimetuple()) <= since)
+
     @classmethod
     def check_method_allowed(cls, request):
         """ Ensure the request HTTP method is permitted for this resource.
@@ -262,26 +607,36 @@ class HandlerMixin(DynamicMixin):
         """
 
         if self.parent:
+            if self.get_resources_joined(request, resources):
+                return resources
+
             resources = self.parent.get_resources(request, **resources)
 
         pks = (
             resources.get(self._meta.name) or
             request.REQUEST.getlist(self._meta.name) or
-            getattr(request, 'data', None) and request.data.get(
-                self._meta.name))
+            isinstance(getattr(request, 'data', None), dict) and
+            request.data.get(self._meta.name))
+
+        if not pks:
+            return resources
 
-        if not pks or self._meta.queryset is None:
+        qs = self.get_queryset()
+        if qs is None:
             return resources
 
         pks = as_tuple(pks)
 
+        projection = request.method == 'GET' and self.get_projection(request)
+        if projection:
+            qs = qs.only(*projection)
+
         try:
             if len(pks) == 1:
-                resources[self._meta.name] = self._meta.queryset.get(pk=pks[0])
+                resources[self._meta.name] = qs.get(pk=pks[0])
 
             else:
-                resources[self._meta.name] = self._meta.queryset.filter(
-                    pk__in=pks)
+                resources[self._meta.name] = qs.filter(pk__in=pks)
 
         except (ObjectDoesNotExist, ValueError, AssertionError):
             raise HttpError("Resource not found.",
@@ -293,5 +648,53 @@ class HandlerMixin(DynamicMixin):
 
         return resources
 
+    def get_resources_joined(self, request, resources):
+        """ Load the resource's object with all parents by one query.
+
+        Works when primary keys of the resource and parents are given in
+        URL, relations to all parents are known and parents' resources
+        are loaded by default.
+
+        :return bool: True if resources are loaded
+
+        """
+        pk = resources.get(self._meta.name)
+        relations = self._meta.relations
+        if not pk or isinstance(pk, (Model, list, tuple)) or \
+                self._meta.queryset is None or \
+                len(relations) != len(self._meta.parents):
+            return False
+
+        lookups = dict()
+        for parent, lookup in relations:
+            parent_pk = resources.get(parent._meta.name)
+            if not parent_pk or isinstance(parent_pk, (Model, list, tuple)) \
+                    or parent._meta.queryset is None \
+                    or parent._meta.queryset.query.where \
+                    or parent.get_queryset.im_func is not \
+                    DynamicMixin.get_queryset.im_func \
+                    or parent.get_resources.im_func is not \
+                    HandlerMixin.get_resources.im_func:
+                return False
+            lookups[lookup] = parent_pk
+
+        qs = self.get_queryset().select_related(relations[-1][1])
+        projection = request.method == 'GET' and self.get_projection(request)
+        if projection:
+            qs = qs.only(relations[0][1], *projection)
+
+        try:
+            obj = qs.get(pk=pk, **lookups)
+        except (ObjectDoesNotExist, MultipleObjectsReturned, ValueError):
+            # Resolve by levels for right errors
+            return False
+
+        resources[self._meta.name] = o = obj
+        for parent, lookup in relations:
+            o = getattr(o, lookup.split(LOOKUP_SEP)[-1])
+            resources[parent._meta.name] = o
+
+        return True
+
 
 # pymode:lint_ignore=E1102,W0212,R0924
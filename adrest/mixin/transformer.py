@@ -1,6 +1,7 @@
 """ ADRest transformation support. """
 
-from ..utils.transformers import SmartTransformer, BaseTransformer
+from ..utils.transformers import (
+    SmartTransformer, BaseTransformer, plan_related)
 from ..utils.meta import MixinBaseMeta
 from ..utils.tools import as_tuple
 
@@ -46,6 +47,24 @@ class TransformerMeta(MixinBaseMeta):
                     "`adrest.utils.transformers.BaseTransformer`"
                 )
 
+        # Plan loading of serialized relations for collections
+        cls._meta.select_related = list(as_tuple(cls._meta.select_related))
+        cls._meta.prefetch_related = list(
+            as_tuple(cls._meta.prefetch_related))
+
+        transformer = cls._meta.transformers[0]
+        if cls._meta.model and issubclass(transformer, SmartTransformer):
+            for lookup, prefetch in plan_related(
+                    cls, cls._meta.model, transformer=transformer,
+                    fields=cls._meta.emit_fields,
+                    include=cls._meta.emit_include,
+                    exclude=cls._meta.emit_exclude,
+                    related=cls._meta.emit_related):
+                lookups = cls._meta.prefetch_related if prefetch else \
+                    cls._meta.select_related
+                if not lookup in lookups:
+                    lookups.append(lookup)
+
         return cls
 
 
@@ -49,6 +49,17 @@ ADREST_CONFIG = {
     # List of errors notifiers
     "NOTIFIERS": ["adrest.utils.notifiers.email_notifier"],
 
+    #: Number of worker threads for deferred log handlers, notifiers and
+    #: signal receivers (see `adrest.utils.deferred`).
+    #: Set DEFERRED_WORKERS = 0 to run them inline
+    "DEFERRED_WORKERS": 0,
+
+    #: Maximum size of the deferred tasks queue
+    "DEFERRED_QUEUE_SIZE": 1000,
+
+    #: What to do when the deferred queue is full: 'inline', 'drop', 'block'
+    "DEFERRED_OVERFLOW": 'inline',
+
     #: Set maximum requests per timeframe
     "THROTTLE_AT": 120,
 
@@ -58,6 +69,18 @@ ADREST_CONFIG = {
     #: We do not restrict access for OPTIONS request.
     "ALLOW_OPTIONS": False,
 
+    #: Send timings of dispatch stages in `Server-Timing` response header.
+    #: Could be redefined for api or resource with `server_timing` option.
+    "SERVER_TIMING": False,
+
+    #: List of timings collectors. Collector is called with resource,
+    #: request, response and list of (stage, duration in seconds) pairs.
+    "TIMING_COLLECTORS": [],
+
+    #: Default backend for full-text search in resources with
+    #: `search_fields` (see `adrest.utils.search`)
+    "SEARCH_BACKEND": 'adrest.utils.search.SimpleSearch',
+
     #: Template path for ADRest map
     "MAP_TEMPLATE": 'api/map.html',
 
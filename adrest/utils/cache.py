@@ -0,0 +1,158 @@
+""" Cache support.
+
+Cached data is invalidated by per-model generation counters. Counters are
+stored in Django cache and bumped on `post_save` and `post_delete` signals
+of watched models.
+
+"""
+import hashlib
+from time import time
+
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import get_models
+from django.db.models.signals import post_save, post_delete
+from django.db.models.sql.datastructures import EmptyResultSet
+
+
+__all__ = (
+    'cache', 'get_generations', 'bump_generation', 'watch',
+    'CachedCollection')
+
+# Expired counters are restarted from the current time
+GENERATION_TIMEOUT = 60 * 60 * 24
+
+
+def generation_key(model):
+    " Cache key for model's generation counter. "
+
+    return 'adrest:generation:%s' % model._meta
+
+
+def get_generations(*models):
+    """ Get generation counters of the models.
+
+    :return list: generations
+
+    """
+    keys = [generation_key(m) for m in models]
+    generations = cache.get_many(keys)
+
+    for key in keys:
+        if not key in generations:
+            # Start from the current time to skip data cached before a
+            # counter has been evicted
+            generations[key] = int(time() * 1000)
+            cache.add(key, generations[key], GENERATION_TIMEOUT)
+
+    return [generations[key] for key in keys]
+
+
+def bump_generation(sender, **kwargs):
+    " Invalidate cached data of the model. "
+
+    key = generation_key(sender)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, int(time() * 1000), GENERATION_TIMEOUT)
+
+
+# Models with watched changes
+WATCHED = set()
+
+
+def watch(*models):
+    " Bump generation counters when models are changed. "
+
+    for model in models:
+        if model in WATCHED:
+            continue
+
+        WATCHED.add(model)
+        uid = 'adrest.generation.%s' % model._meta
+        post_save.connect(bump_generation, sender=model, dispatch_uid=uid)
+        post_delete.connect(bump_generation, sender=model, dispatch_uid=uid)
+
+
+class CachedCollection(object):
+
+    """ Collection with cached count and primary keys of slices.
+
+    Cache key is made from SQL of the queryset (filters and sorting) and
+    generations of models whose tables are used in the SQL (the queryset's
+    model and related models of filters and sorting), so cached data is
+    invalidated when any of them is changed (see `watch`). Objects of
+    slices are loaded by primary keys in one query. Other attributes are
+    proxied to the queryset.
+
+    """
+
+    def __init__(self, queryset, timeout=None):
+        self.queryset, self.timeout = queryset, timeout
+        self._key = None
+
+    def __getattr__(self, name):
+        return getattr(self.queryset, name)
+
+    @property
+    def key(self):
+        """ Get cache key of the collection.
+
+        :return str: key or None if the queryset is always empty
+
+        """
+        if self._key is None:
+            try:
+                sql, params = self.queryset.query.sql_with_params()
+            except EmptyResultSet:
+                self._key = False
+            else:
+                qn = connections[self.queryset.db].ops.quote_name
+                models = [m for m in get_models() if m is not
+                          self.queryset.model and qn(m._meta.db_table) in sql]
+                models.insert(0, self.queryset.model)
+                watch(*models)
+                self._key = 'adrest:collection:%s' % hashlib.md5(repr((
+                    sql, params, get_generations(*models),
+                ))).hexdigest()
+
+        return self._key
+
+    def count(self):
+        """ Get count of the collection's objects.
+
+        :return int: count
+
+        """
+        if not self.key:
+            return 0
+
+        key = self.key + ':count'
+        count = cache.get(key)
+        if count is None:
+            count = self.queryset.count()
+            cache.set(key, count, self.timeout)
+        return count
+
+    def __len__(self):
+        return self.count()
+
+    def __iter__(self):
+        return iter(self[:])
+
+    def __getitem__(self, k):
+        if not isinstance(k, slice):
+            return self[k:k + 1][0]
+
+        if not self.key or k.step:
+            return list(self.queryset[k])
+
+        key = '%s:%s:%s' % (self.key, k.start, k.stop)
+        pks = cache.get(key)
+        if pks is None:
+            pks = list(self.queryset[k].values_list('pk', flat=True))
+            cache.set(key, pks, self.timeout)
+
+        objects = self.queryset.in_bulk(pks)
+        return [objects[pk] for pk in pks if pk in objects]
@@ -0,0 +1,98 @@
+""" Response compression support. """
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+__all__ = 'negotiate', 'compress', 'compress_sequence'
+
+
+# Window bits for gzip container
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+def gzip_compress(content, level):
+    " Compress string by gzip. "
+
+    compressor = zlib.compressobj(level, zlib.DEFLATED, GZIP_WBITS)
+    return compressor.compress(content) + compressor.flush()
+
+
+def gzip_compress_sequence(sequence, level):
+    " Compress sequence of strings by gzip. "
+
+    compressor = zlib.compressobj(level, zlib.DEFLATED, GZIP_WBITS)
+    for chunk in sequence:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def brotli_compress(content, level):
+    " Compress string by brotli. "
+
+    return brotli.compress(content, quality=level)
+
+
+def brotli_compress_sequence(sequence, level):
+    " Compress sequence of strings by brotli. "
+
+    compressor = brotli.Compressor(quality=level)
+    for chunk in sequence:
+        data = compressor.process(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+# Supported encodings by preference
+ENCODINGS = [('gzip', gzip_compress, gzip_compress_sequence)]
+
+if brotli:
+    ENCODINGS.insert(0, ('br', brotli_compress, brotli_compress_sequence))
+
+CODERS = dict((e[0], e[1:]) for e in ENCODINGS)
+
+
+def negotiate(accept_encoding):
+    """ Select the best supported encoding from `Accept-Encoding` header.
+
+    :return str: encoding or None
+
+    """
+    accepted = dict()
+    for bit in accept_encoding.split(','):
+        params = bit.split(';')
+        encoding, quality = params[0].strip().lower(), 1.0
+        for param in params[1:]:
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0
+        accepted[encoding] = quality
+
+    best, best_quality = None, 0
+    for encoding, _, _ in ENCODINGS:
+        quality = accepted.get(encoding, accepted.get('*', 0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+
+    return best
+
+
+def compress(encoding, content, level):
+    " Compress string. "
+
+    return CODERS[encoding][0](content, level)
+
+
+def compress_sequence(encoding, sequence, level):
+    " Compress sequence of strings. "
+
+    return CODERS[encoding][1](sequence, level)
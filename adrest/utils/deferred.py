@@ -0,0 +1,132 @@
+""" Run ADRest handlers after a response has been returned.
+
+Log handlers, errors notifiers and signal receivers could be marked by
+:func:`deferred` decorator. Marked functions are pushed to in-process queue
+and executed by worker threads, so they do not add latency to API calls.
+
+::
+
+    from adrest.utils.deferred import deferred
+
+    @deferred
+    def stats_handler(resource, request=None, response=None, **resources):
+        ...
+
+Deferred execution is disabled by default (``DEFERRED_WORKERS = 0``) and
+marked functions are called inline.
+
+"""
+import threading
+from functools import wraps
+from logging import getLogger
+from Queue import Queue, Full
+
+try:
+    from django.db import close_old_connections as close_connections
+except ImportError: # django < 1.6
+    from django.db import close_connection as close_connections
+
+from ..settings import ADREST_CONFIG
+
+
+__all__ = 'Executor', 'deferred', 'executor'
+
+logger = getLogger(ADREST_CONFIG['LOGGER_NAME'])
+
+
+class Executor(object):
+
+    """ Bounded queue of tasks served by worker threads.
+
+    :param workers: Number of worker threads (0 -- run tasks inline)
+    :param size: Maximum size of the queue
+    :param overflow: What to do when the queue is full: 'inline' -- run a
+        task in current thread, 'drop' -- skip a task, 'block' -- wait for a
+        free slot.
+
+    """
+
+    policies = 'inline', 'drop', 'block'
+
+    def __init__(self, workers=0, size=1000, overflow='inline'):
+        if not overflow in self.policies:
+            raise AssertionError(
+                "Overflow policy should be one of: %s" % ', '.join(
+                    self.policies))
+
+        self.workers, self.overflow = workers, overflow
+        self.queue = Queue(size)
+        self.threads = []
+        self.lock = threading.Lock()
+
+    def submit(self, func, *args, **kwargs):
+        """ Put a task to the queue.
+
+        :return object: Result of function if it has been called inline
+
+        """
+        if not self.workers:
+            return func(*args, **kwargs)
+
+        self.start()
+
+        try:
+            self.queue.put((func, args, kwargs), self.overflow == 'block')
+
+        except Full:
+            if self.overflow == 'inline':
+                return func(*args, **kwargs)
+
+            logger.warning("Deferred queue is full. Task dropped: %s", func)
+
+    def start(self):
+        """ Start worker threads. Threads are started on first task for
+        compatibility with forking servers.
+
+        """
+        if self.threads:
+            return
+
+        with self.lock:
+            while len(self.threads) < self.workers:
+                thread = threading.Thread(target=self.work)
+                thread.daemon = True
+                thread.start()
+                self.threads.append(thread)
+
+    def join(self):
+        """ Wait for all tasks in the queue. """
+        self.queue.join()
+
+    def work(self):
+        """ Serve tasks from the queue. """
+        while True:
+            func, args, kwargs = self.queue.get()
+            try:
+                func(*args, **kwargs)
+            except Exception:
+                logger.exception("Deferred task failed: %s", func)
+            finally:
+                close_connections()
+                self.queue.task_done()
+
+
+executor = Executor(
+    workers=ADREST_CONFIG['DEFERRED_WORKERS'],
+    size=ADREST_CONFIG['DEFERRED_QUEUE_SIZE'],
+    overflow=ADREST_CONFIG['DEFERRED_OVERFLOW'])
+
+
+def deferred(func):
+    """ Run the function after response by ADRest executor.
+
+    :return function: wrapped function
+
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        return executor.submit(func, *args, **kwargs)
+    return wrapper
+
+
+# pymode:lint_ignore=W0703
@@ -261,6 +261,10 @@ class TemplateEmitter(BaseEmitter):
             content = self.resource._meta.model
 
         if isinstance(content, (Model, ModelBase)):
+            # Deferred models are proxies of original models
+            if content._deferred:
+                content = content._meta.proxy_for_model
+
             app = content._meta.app_label # nolint
             name = content._meta.module_name # nolint
 
@@ -0,0 +1,300 @@
+""" Compiled filters for collections.
+
+Filter schema maps keys of query params (`name`, `name__icontains`,
+`author__name__startswith`) to lookups and converters of values. Schema
+is compiled for model's fields and fields of related models (one level),
+deeper relations (up to `MAX_RELATIONS`) are resolved on demand and
+cached in a bounded cache.
+
+"""
+import re
+from logging import getLogger
+
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, connections
+from django.db.models.fields import FieldDoesNotExist
+from django.db.models.sql.datastructures import EmptyResultSet
+
+from ..settings import ADREST_CONFIG
+from .exceptions import HttpError
+from .status import HTTP_400_BAD_REQUEST
+from .tools import as_tuple
+
+
+__all__ = (
+    'LOOKUP_SEP', 'compile_schema', 'parse_filter', 'compile_allowed',
+    'explain', 'check_plan')
+
+logger = getLogger(ADREST_CONFIG['LOGGER_NAME'])
+
+# Separator used to split filter strings apart.
+LOOKUP_SEP = '__'
+
+# Suffix for excluding filters
+EXCLUDE = 'not'
+
+# Maximum number of relations in filters
+MAX_RELATIONS = 3
+
+# Compiled filters for deeper relations by models and keys
+CACHE_SIZE = 1000
+CACHE = dict()
+
+COMMON_LOOKUPS = 'exact', 'in', 'isnull', 'gt', 'gte', 'lt', 'lte', 'range'
+TEXT_LOOKUPS = COMMON_LOOKUPS + (
+    'iexact', 'contains', 'icontains', 'startswith', 'istartswith',
+    'endswith', 'iendswith', 'regex', 'iregex', 'search')
+DATE_LOOKUPS = COMMON_LOOKUPS + ('year', 'month', 'day', 'week_day')
+BOOLEAN_LOOKUPS = 'exact', 'in', 'isnull'
+
+# Lookups which could be used with B-tree indexes
+INDEXED_LOOKUPS = (
+    'exact', 'in', 'isnull', 'gt', 'gte', 'lt', 'lte', 'range', 'startswith',
+    'year')
+
+# Value of `filterable` and `sortable` options for indexed fields
+INDEXED = 'indexed'
+
+# Sequential scans in query plans of SQLite, PostgreSQL and MySQL
+SEQ_SCAN = re.compile(r'Seq Scan|\bSCAN\b(?!.*\bINDEX\b)|\bALL\b')
+
+FIELD_LOOKUPS = dict(
+    (field, lookups)
+    for lookups, fields in (
+        (TEXT_LOOKUPS, (
+            'CharField', 'CommaSeparatedIntegerField', 'EmailField',
+            'FilePathField', 'GenericIPAddressField', 'IPAddressField',
+            'SlugField', 'TextField', 'URLField')),
+        (DATE_LOOKUPS, ('DateField', 'DateTimeField')),
+        (BOOLEAN_LOOKUPS, ('BooleanField', 'NullBooleanField')),
+    )
+    for field in fields
+)
+
+
+def get_lookups(field):
+    " Get lookups allowed for the field. "
+
+    if field.rel:
+        return COMMON_LOOKUPS
+
+    return FIELD_LOOKUPS.get(field.get_internal_type(), COMMON_LOOKUPS)
+
+
+def split(value):
+    " Split comma separated values. "
+
+    return [v for v in value.split(',') if v]
+
+
+def get_converter(field, lookup):
+    """ Get function which converts a list of values from query for the
+    field's lookup.
+
+    :return function: converter
+
+    """
+    if field.rel:
+        field = field.rel.get_related_field()
+    to_python = field.to_python
+
+    if lookup == 'in':
+        return lambda values: [
+            to_python(v) for value in values for v in split(value)]
+
+    if lookup == 'range':
+
+        def convert_range(values):
+            bounds = [to_python(v) for value in values for v in split(value)]
+            if len(bounds) != 2:
+                raise ValueError("Range should have two bounds.")
+            return bounds
+
+        return convert_range
+
+    if lookup == 'isnull':
+        return lambda values: values[-1].lower() in ('1', 'true', 'yes')
+
+    if lookup in ('year', 'month', 'day', 'week_day'):
+        return lambda values: int(values[-1])
+
+    if lookup in COMMON_LOOKUPS:
+        return lambda values: to_python(values[-1])
+
+    return lambda values: values[-1]
+
+
+def compile_filter(model, tokens):
+    """ Compile filter for query key's tokens.
+
+    :return tuple: (lookup path, lookup, converter, field) or None
+
+    """
+    tokens, path, field, opts = list(tokens), [], None, model._meta
+    while tokens:
+        try:
+            field = opts.get_field(tokens[0])
+        except FieldDoesNotExist:
+            break
+
+        path.append(tokens.pop(0))
+        if not field.rel:
+            break
+
+        if len(path) > MAX_RELATIONS:
+            return None
+
+        opts = field.rel.to._meta
+
+    if field is None or len(tokens) > 1:
+        return None
+
+    lookup = tokens and tokens[0] or 'exact'
+    if not lookup in get_lookups(field):
+        return None
+
+    return LOOKUP_SEP.join(path), lookup, get_converter(field, lookup), field
+
+
+def compile_schema(model):
+    """ Compile filters for fields of the model and related models.
+
+    :return dict: filters by keys
+
+    """
+    schema = dict()
+    for field in model._meta.fields:
+        fields = [((field.name,), field)]
+        if field.rel:
+            fields += [
+                ((field.name, f.name), f) for f in field.rel.to._meta.fields]
+
+        for names, f in fields:
+            for lookup in get_lookups(f):
+                tokens = names + (lookup,)
+                schema[LOOKUP_SEP.join(tokens)] = compile_filter(
+                    model, tokens)
+            schema[LOOKUP_SEP.join(names)] = compile_filter(model, names)
+
+    return schema
+
+
+def get_indexed_fields(model):
+    """ Get names of model's fields which are leading columns of indexes.
+
+    :return set: names of fields
+
+    """
+    opts = model._meta
+    names = set(
+        f.name for f in opts.fields if f.db_index or f.unique or f.primary_key)
+
+    # Django < 1.5 has no index_together
+    for fields in tuple(getattr(opts, 'index_together', ())) + \
+            tuple(opts.unique_together):
+        if fields:
+            names.add(fields[0])
+
+    return names
+
+
+def compile_allowed(model, option):
+    """ Compile `filterable` or `sortable` option.
+
+    :return tuple: (allowed names, allowed lookups) or None if everything
+        is allowed
+
+    """
+    if option is None:
+        return None
+
+    if option == INDEXED:
+        return frozenset(get_indexed_fields(model)), INDEXED_LOOKUPS
+
+    return frozenset(as_tuple(option)), None
+
+
+def parse_filter(schema, model, key, values, allowed=None):
+    """ Parse filter from query param.
+
+    :return tuple: (key for queryset's filter, value, exclude)
+
+    """
+    exclude = key.endswith(LOOKUP_SEP + EXCLUDE)
+    if exclude:
+        key = key[:-len(LOOKUP_SEP + EXCLUDE)]
+
+    compiled = schema.get(key) or CACHE.get((model, key))
+    if compiled is None:
+        compiled = compile_filter(model, key.split(LOOKUP_SEP))
+        if compiled is None:
+            raise HttpError(
+                "Invalid filter: %s" % key, status=HTTP_400_BAD_REQUEST)
+
+        # Cache compiled filters for deeper relations
+        if len(CACHE) >= CACHE_SIZE:
+            CACHE.clear()
+        CACHE[(model, key)] = compiled
+
+    path, lookup, converter, field = compiled
+    if lookup == 'exact' and len(values) > 1:
+        # Repeated params are values as is (they aren't splitted by commas)
+        to_python = (field.rel.get_related_field() if field.rel
+                     else field).to_python
+        lookup, converter = 'in', lambda values: [
+            to_python(v) for v in values]
+
+    if allowed and (not path in allowed[0] or
+                    allowed[1] and not lookup in allowed[1]):
+        raise HttpError(
+            "Filter is not allowed: %s" % key, status=HTTP_400_BAD_REQUEST)
+
+    try:
+        value = converter(values)
+    except (ValidationError, ValueError, TypeError):
+        raise HttpError(
+            "Invalid value of filter: %s" % key, status=HTTP_400_BAD_REQUEST)
+
+    if lookup != 'exact':
+        path = LOOKUP_SEP.join((path, lookup))
+
+    return path, value, exclude
+
+
+def explain(queryset):
+    """ Get query plan of the queryset.
+
+    :return list: rows of the plan as strings (empty if the database
+        doesn't support EXPLAIN)
+
+    """
+    connection = connections[queryset.db]
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        return []
+
+    prefix = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' \
+        else 'EXPLAIN '
+    try:
+        cursor = connection.cursor()
+        cursor.execute(prefix + sql, params)
+        return [
+            ' '.join(unicode(c) for c in row) for row in cursor.fetchall()]
+    except DatabaseError, e:
+        logger.debug("Query plan is not available: %s", e)
+        return []
+
+
+def check_plan(queryset):
+    """ Log sequential scans in query plan of the queryset.
+
+    :return bool: False if the plan has sequential scans
+
+    """
+    scans = [row for row in explain(queryset) if SEQ_SCAN.search(row)]
+    if scans:
+        logger.warning(
+            "Sequential scan in query: %s\n%s", queryset.query,
+            '\n'.join(scans))
+    return not scans
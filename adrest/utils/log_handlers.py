@@ -2,14 +2,17 @@
 # -*- coding: utf-8 -*-
 from django.utils.encoding import smart_unicode
 from adrest.models import Access
+from adrest.utils.deferred import deferred
 
 
-def db_handler(resource, request=None, response=None, **resources):
+def db_handler(resource, request=None, response=None,
+               save=Access.objects.create, **resources):
     """Processing for api request
 
     :param resource: :class:``adrest.views.ResourceView`` object
     :param request: :class:``django.http.HttpRequest`` object
     :param response: :class:``django.http.HttpResponse`` object
+    :param save: Function which saves an access log
     :params \*\*resources\*\*: dict of resouces
 
     """
@@ -27,7 +30,7 @@ def db_handler(resource, request=None, response=None, **resources):
         else:
             content = response.content[:5000]
 
-    Access.objects.create(
+    return save(
         uri=request.path_info,
         method=request.method,
         version=str(resource.api or ''),
@@ -39,3 +42,11 @@ def db_handler(resource, request=None, response=None, **resources):
             response=content)
 
 
+def deferred_db_handler(resource, request=None, response=None, **resources):
+    """ Prepare an access log and save it after response.
+
+    Log data is collected in current thread.
+
+    """
+    return db_handler(resource, request=request, response=response,
+                      save=deferred(Access.objects.create), **resources)
@@ -7,11 +7,12 @@ import traceback
 import sys
 from django.core.mail import mail_admins
 from ..settings import ADREST_CONFIG
+from .deferred import deferred
 
 api_logger = getLogger(ADREST_CONFIG['LOGGER_NAME'])
 
 
-def email_notifier(request, response):
+def email_notifier(request, response, send=mail_admins):
     """ Send a mail about ADRest errors.
 
     :return bool: status of operation
@@ -35,7 +36,16 @@ Request information:
 %s
 
 """ % (stack_trace, repr(getattr(request, 'data', None)), repr(request))
-    return mail_admins(subject, message, fail_silently=True)
+    return send(subject, message, fail_silently=True)
+
+
+def deferred_email_notifier(request, response):
+    """ Prepare a mail about ADRest errors and send it after response.
+
+    Stacktrace is collected in current thread.
+
+    """
+    return email_notifier(request, response, send=deferred(mail_admins))
 
 
 def logging_notifier(request, response):
@@ -2,9 +2,14 @@
 
 from urllib import urlencode
 
+from django.core import signing
+from django.core.exceptions import ValidationError
 from django.core.paginator import InvalidPage, Paginator as DjangoPaginator
+from django.db.models import Q
+from django.db.models.fields import FieldDoesNotExist
 
 from .exceptions import HttpError
+from .filters import LOOKUP_SEP
 from .status import HTTP_400_BAD_REQUEST
 
 
@@ -12,6 +17,9 @@ class Paginator(object):
 
     """ Paginate collections. """
 
+    #: Paginator uses cursors instead of page numbers
+    keyset = False
+
     def __init__(self, request, resource, response):
         self.query_dict = dict([[k, unicode(v).encode('utf-8')] for k, v in request.GET.items()])
 
@@ -123,3 +131,216 @@ class Paginator(object):
                 self.query_dict['page'] = previous
             return "%s?%s" % (self.path, urlencode(self.query_dict))
         return ""
+
+
+class CursorPaginator(Paginator):
+
+    """ Paginate querysets by cursors (keyset pagination).
+
+    Cursor is a signed value of sorting fields of the last (or the first
+    for previous page) resource. Pages are selected by filters on sorting
+    fields, so deep pages cost the same as the first one and the
+    collection is never counted. Primary key is added to sorting for
+    unique order. Sorting by relations and nullable fields is rejected.
+
+    """
+
+    keyset = True
+
+    #: Salt of cursors' signatures
+    salt = 'adrest.paginator.cursor'
+
+    def __init__(self, request, resource, response):
+        self.query_dict = dict([[k, unicode(v).encode('utf-8')] for k, v in request.GET.items()])
+        self.path = request.path
+        self.queryset = response
+
+        try:
+            self.per_page = int(
+                self.query_dict.get(resource._meta.dyn_prefix + 'max') or
+                resource._meta.limit_per_page)
+        except ValueError:
+            self.per_page = 0
+
+        # Disable pagination without limit
+        self.paginator = self if self.per_page > 0 else None
+        self.ordering = self.paginator and self.get_ordering()
+
+        self._page = None
+
+    def to_simple(self, transformer=None, **options):
+        """ Prepare to serialization.
+
+        :return dict: paginator params
+
+        """
+        return dict(
+            next=self.next_page,
+            prev=self.previous_page,
+            resources=self.resources,
+        )
+
+    def get_ordering(self):
+        """ Get sorting of the queryset with primary key as tiebreaker.
+
+        :return list: (field, descending) pairs
+
+        """
+        query = self.queryset.query
+        names = list(query.order_by or (
+            query.default_ordering and query.get_meta().ordering or []))
+
+        opts, ordering = self.queryset.model._meta, []
+        for name in names:
+            descending = name.startswith('-')
+            name = name.lstrip('-')
+            try:
+                field = opts.pk if name == 'pk' else opts.get_field(name)
+            except FieldDoesNotExist:
+                field = None
+
+            if field is None or field.rel or field.null or \
+                    LOOKUP_SEP in name:
+                raise HttpError(
+                    "Invalid sorting for cursor: %s" % name,
+                    status=HTTP_400_BAD_REQUEST)
+
+            ordering.append((field, descending))
+            if field.primary_key:
+                return ordering
+
+        ordering.append((opts.pk, ordering and ordering[-1][1] or False))
+        return ordering
+
+    @property
+    def page(self):
+        """ Get resources of current page.
+
+        :return list: resources
+
+        """
+        if self._page is None:
+            ordering = self.ordering
+            values, previous = self.decode(
+                self.query_dict.get('cursor'), ordering)
+
+            qs = self.queryset.order_by(*[
+                '%s%s' % ('-' if descending != previous else '', field.name)
+                for field, descending in ordering])
+            if values:
+                qs = qs.filter(self.get_query(ordering, values, previous))
+
+            resources = list(qs[:self.per_page + 1])
+            more = len(resources) > self.per_page
+            resources = resources[:self.per_page]
+            if previous:
+                resources.reverse()
+
+            self.has_next = previous or more
+            self.has_previous = bool(values) and (more or not previous)
+            self._page = resources
+
+        return self._page
+
+    @staticmethod
+    def get_query(ordering, values, previous=False):
+        """ Make query for resources after the values in ordering
+        (before the values for previous page).
+
+        :return Q: query
+
+        """
+        query = Q()
+        for i, (field, descending) in enumerate(ordering):
+            lookup = 'lt' if descending != previous else 'gt'
+            q = Q(**{'%s__%s' % (field.name, lookup): values[i]})
+            for j, (f, _) in enumerate(ordering[:i]):
+                q &= Q(**{f.name: values[j]})
+            query |= q
+        return query
+
+    def encode(self, resource, previous=False):
+        """ Make cursor for the resource.
+
+        :return str: signed cursor
+
+        """
+        values = []
+        for field, _ in self.ordering:
+            value = getattr(resource, field.attname)
+            values.append(
+                None if value is None else field.value_to_string(resource))
+
+        return signing.dumps(
+            [int(previous), [f.name for f, _ in self.ordering], values],
+            salt=self.salt)
+
+    def decode(self, cursor, ordering):
+        """ Load values from cursor.
+
+        :return tuple: (values or None, previous page)
+
+        """
+        if not cursor:
+            return None, False
+
+        try:
+            previous, names, values = signing.loads(cursor, salt=self.salt)
+            if names != [f.name for f, _ in ordering] or None in values:
+                raise ValueError("Invalid cursor.")
+
+            return [f.to_python(v) for (f, _), v in zip(
+                ordering, values)], bool(previous)
+
+        except (signing.BadSignature, ValidationError, ValueError,
+                TypeError):
+            raise HttpError("Invalid cursor", status=HTTP_400_BAD_REQUEST)
+
+    @property
+    def page_number(self):
+        " Pages are not numbered. "
+
+        return None
+
+    @property
+    def count(self):
+        " Collection is not counted. "
+
+        return None
+
+    @property
+    def resources(self):
+        """ Return list of current page resources.
+
+        :return list:
+
+        """
+        return self.page
+
+    def get_link(self, resource, previous=False):
+        " Make URL for page after (before) the resource. "
+
+        self.query_dict['cursor'] = self.encode(resource, previous)
+        return "%s?%s" % (self.path, urlencode(self.query_dict))
+
+    @property
+    def next_page(self):
+        """ Return URL for next page.
+
+        :return str:
+
+        """
+        if self.page and self.has_next:
+            return self.get_link(self.page[-1])
+        return ""
+
+    @property
+    def previous_page(self):
+        """ Return URL for previous page.
+
+        :return str:
+
+        """
+        if self.page and self.has_previous:
+            return self.get_link(self.page[0], previous=True)
+        return ""
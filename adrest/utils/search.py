@@ -0,0 +1,315 @@
+""" Full-text search backends.
+
+Backend is created for a model and fields to search by
+(`Meta.search_fields`) and filters querysets by user's query::
+
+    class BookResource(ResourceView):
+
+        class Meta:
+            model = 'main.book'
+            search_fields = 'title', 'description'
+            search_backend = 'adrest.utils.search.SQLiteSearch'
+
+    GET /book/?adr-q=django+rest
+
+Index backends keep a side table in sync by `post_save` and `post_delete`
+signals of the model. Tables are created (and filled from the models'
+tables) by `syncdb` for resources loaded at that time and by the
+`adrest_search` management command. Until the table exists the backend
+searches by `icontains` lookups and doesn't index changes.
+
+"""
+import hashlib
+import re
+
+from django.db import connections, router
+from django.db.models import AutoField, Q
+from django.db.models.signals import post_save, post_delete, post_syncdb
+from django.utils.encoding import smart_unicode
+
+
+__all__ = (
+    'BaseSearch', 'SimpleSearch', 'SQLiteSearch', 'PostgresSearch',
+    'INDEXES')
+
+
+# Words of query
+WORDS = re.compile(r'\w+', re.U)
+
+# Created index backends
+INDEXES = []
+
+
+def search_icontains(queryset, fields, words):
+    """ Filter queryset by `icontains` lookups. Every word should be found
+    in any of fields.
+
+    :return QuerySet: filtered queryset
+
+    """
+    for word in words:
+        q = Q()
+        for name in fields:
+            q |= Q(**{'%s__icontains' % name: word})
+        queryset = queryset.filter(q)
+    return queryset
+
+
+class BaseSearch(object):
+
+    """ Interface of search backends. """
+
+    #: Backend keeps index by model's signals
+    indexed = False
+
+    def __init__(self, model, fields):
+        self.model, self.fields = model, tuple(fields)
+
+    @staticmethod
+    def get_words(query):
+        """ Split query to words.
+
+        :return list: words
+
+        """
+        return WORDS.findall(query)
+
+    def search(self, queryset, query):
+        """ Filter queryset by query.
+
+        :return QuerySet: filtered queryset
+
+        """
+        raise NotImplementedError
+
+
+class SimpleSearch(BaseSearch):
+
+    """ Search by `icontains` lookups. Every word of query should be found
+    in any of fields.
+
+    """
+
+    def search(self, queryset, query):
+        return search_icontains(
+            queryset, self.fields, self.get_words(query))
+
+
+class IndexSearch(BaseSearch):
+
+    """ Base class for backends with a side index table. """
+
+    indexed = True
+
+    def __init__(self, model, fields):
+        super(IndexSearch, self).__init__(model, fields)
+
+        opts = model._meta
+        self.columns = [opts.get_field(name).column for name in self.fields]
+
+        # Every set of fields has own table
+        self.table = 'adrest_search_%s_%s' % (opts.db_table, hashlib.md5(
+            ','.join(self.columns)).hexdigest()[:8])
+
+        # Existence of the table by databases
+        self.tables = dict()
+
+        uid = 'adrest.search.%s.%s' % (opts, self.table)
+        post_save.connect(self.update, sender=model, dispatch_uid=uid)
+        post_delete.connect(self.remove, sender=model, dispatch_uid=uid)
+
+        INDEXES.append(self)
+
+    def get_connection(self, queryset=None):
+        " Get connection to the model's database. "
+
+        return connections[
+            queryset.db if queryset is not None else
+            router.db_for_write(self.model)]
+
+    def get_text(self, instance):
+        " Get indexed texts of the instance. "
+
+        return [smart_unicode(getattr(instance, name) or '')
+                for name in self.fields]
+
+    def exists(self, connection):
+        """ Check that index table exists. Result is memoized, so the
+        table should be created before start (`adrest_search` command).
+
+        :return bool: True if the table exists
+
+        """
+        if not connection.alias in self.tables:
+            self.tables[connection.alias] = self.table in \
+                connection.introspection.table_names()
+
+        return self.tables[connection.alias]
+
+    def ensure_table(self, connection):
+        """ Create and fill index table if it doesn't exist. Creation of
+        the table commits current transaction on some databases (SQLite).
+
+        :return bool: True if table has been created
+
+        """
+        self.tables.pop(connection.alias, None)
+        if self.exists(connection):
+            return False
+
+        cursor = connection.cursor()
+        for sql in self.get_create_sql(connection):
+            cursor.execute(sql)
+
+        self.tables[connection.alias] = True
+        return True
+
+    def get_create_sql(self, connection):
+        " SQL for create and fill the index table. "
+
+        raise NotImplementedError
+
+    def update(self, sender, instance, **kwargs):
+        " Update index for the instance. "
+
+        connection = self.get_connection()
+        if not self.exists(connection):
+            return
+
+        self.remove(sender, instance)
+        self.insert(connection, instance)
+
+    def insert(self, connection, instance):
+        " Insert the instance to index. "
+
+        raise NotImplementedError
+
+    def remove(self, sender, instance, **kwargs):
+        " Remove the instance from index. "
+
+        connection = self.get_connection()
+        if not self.exists(connection):
+            return
+
+        qn = connection.ops.quote_name
+        connection.cursor().execute(
+            'DELETE FROM %s WHERE %s = %%s' % (qn(self.table), self.pk),
+            [instance.pk])
+
+    def search(self, queryset, query):
+        words = self.get_words(query)
+        if not words:
+            return queryset
+
+        connection = self.get_connection(queryset)
+        if not self.exists(connection):
+            return search_icontains(queryset, self.fields, words)
+
+        qn = connection.ops.quote_name
+        opts = self.model._meta
+        return queryset.extra(
+            where=['%s.%s IN (%s)' % (
+                qn(opts.db_table), qn(opts.pk.column),
+                self.get_search_sql(connection))],
+            params=[self.get_search_query(words)])
+
+    def get_search_sql(self, connection):
+        " SQL for select primary keys of found instances. "
+
+        raise NotImplementedError
+
+    def get_search_query(self, words):
+        " Query parameter for search SQL. "
+
+        return ' '.join(words)
+
+
+class SQLiteSearch(IndexSearch):
+
+    """ Search by SQLite FTS5 virtual table. Model should have integer
+    primary key. Words of query are searched as prefixes.
+
+    """
+
+    pk = 'rowid'
+
+    def get_create_sql(self, connection):
+        qn = connection.ops.quote_name
+        opts = self.model._meta
+        columns = ', '.join(qn(c) for c in self.columns)
+        yield 'CREATE VIRTUAL TABLE %s USING fts5(%s)' % (
+            qn(self.table), columns)
+        yield 'INSERT INTO %s (rowid, %s) SELECT %s, %s FROM %s' % (
+            qn(self.table), columns, qn(opts.pk.column), columns,
+            qn(opts.db_table))
+
+    def insert(self, connection, instance):
+        qn = connection.ops.quote_name
+        connection.cursor().execute(
+            'INSERT INTO %s (rowid, %s) VALUES (%s)' % (
+                qn(self.table), ', '.join(qn(c) for c in self.columns),
+                ', '.join(['%s'] * (len(self.columns) + 1))),
+            [instance.pk] + self.get_text(instance))
+
+    def get_search_sql(self, connection):
+        qn = connection.ops.quote_name
+        return 'SELECT rowid FROM %s WHERE %s MATCH %%s' % (
+            qn(self.table), qn(self.table))
+
+    def get_search_query(self, words):
+        return ' '.join('"%s"*' % w for w in words)
+
+
+class PostgresSearch(IndexSearch):
+
+    """ Search by PostgreSQL side table with `tsvector` documents and GIN
+    index.
+
+    """
+
+    pk = 'id'
+
+    #: Text search configuration
+    config = 'simple'
+
+    def get_create_sql(self, connection):
+        qn = connection.ops.quote_name
+        opts = self.model._meta
+        pk_type = 'integer' if isinstance(opts.pk, AutoField) \
+            else opts.pk.db_type(connection)
+        document = " || ' ' || ".join(
+            "coalesce(%s, '')" % qn(c) for c in self.columns)
+
+        yield 'CREATE TABLE %s (id %s PRIMARY KEY, document tsvector)' % (
+            qn(self.table), pk_type)
+        yield 'CREATE INDEX %s ON %s USING GIN (document)' % (
+            qn(self.table + '_document'), qn(self.table))
+        yield "INSERT INTO %s (id, document) " \
+            "SELECT %s, to_tsvector('%s', %s) FROM %s" % (
+                qn(self.table), qn(opts.pk.column), self.config, document,
+                qn(opts.db_table))
+
+    def insert(self, connection, instance):
+        connection.cursor().execute(
+            'INSERT INTO %s (id, document) '
+            'VALUES (%%s, to_tsvector(%%s, %%s))' %
+            connection.ops.quote_name(self.table),
+            [instance.pk, self.config, ' '.join(self.get_text(instance))])
+
+    def get_search_sql(self, connection):
+        return "SELECT id FROM %s " \
+            "WHERE document @@ plainto_tsquery('%s', %%s)" % (
+                connection.ops.quote_name(self.table), self.config)
+
+
+def create_indexes(sender, **kwargs):
+    " Create tables of index backends for models of synced application. "
+
+    connection = connections[kwargs.get('db') or 'default']
+    for backend in INDEXES:
+        opts = backend.model._meta
+        if sender.__name__.split('.')[-2:-1] == [opts.app_label] and \
+                router.allow_syncdb(connection.alias, backend.model):
+            backend.ensure_table(connection)
+
+post_syncdb.connect(create_indexes, dispatch_uid='adrest.search.syncdb')
@@ -0,0 +1,58 @@
+""" Measure resource's dispatch stages. """
+from time import time
+
+
+class StageTimer(object):
+
+    """ Collect durations of dispatch stages.
+
+    ::
+
+        timer = StageTimer()
+        with timer('authenticate'):
+            resource.authenticate(request)
+
+    """
+
+    def __init__(self):
+        self.timings = []
+        self.__stage = self.__start = None
+
+    def __call__(self, stage):
+        self.__stage = stage
+        return self
+
+    def __enter__(self):
+        self.__start = time()
+
+    def __exit__(self, *args):
+        self.timings.append((self.__stage, time() - self.__start))
+
+    def to_header(self):
+        """ Format timings for `Server-Timing` header.
+
+        :return str: header value
+
+        """
+        return ', '.join(
+            '%s;dur=%.3f' % (stage, duration * 1000)
+            for stage, duration in self.timings)
+
+
+class NullTimer(object):
+
+    """ Measure nothing. """
+
+    timings = ()
+
+    def __call__(self, stage):
+        return self
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *args):
+        pass
+
+
+NULL_TIMER = NullTimer()
@@ -8,6 +8,7 @@ from decimal import Decimal
 from functools import partial
 from django.http import HttpResponse
 from django.db.models import Model, Manager
+from django.db.models.query import QuerySet, ValuesQuerySet
 from django.utils.encoding import smart_unicode
 
 from .tools import as_tuple
@@ -72,16 +73,19 @@ class SmartTransformer(BaseTransformer):
         if isinstance(data, HttpResponse):
             data = data.content
         super(SmartTransformer, self).__init__(resource, data, request)
+        get_fieldset = getattr(resource, 'get_fieldset', None)
         self.options = self.init_options(fields=self.meta_option('emit_fields'),
                                          include=self.meta_option('emit_include'),
                                          exclude=self.meta_option('emit_exclude'),
-                                         related=self.meta_option('emit_related'))
+                                         related=self.meta_option('emit_related'),
+                                         fieldset=get_fieldset and get_fieldset(request))
         self.custom_simplificators = self.meta_option('simplificators') or ()
 
         self.default_simplificators = ((basestring, self.to_simple_basestring),
                                        (Number, self.to_simple_number),
                                        ((datetime, date, time), self.to_simple_dates),
                                        (collections.MutableMapping, self.to_simple_mutable_maping),
+                                       (QuerySet, self.to_simple_queryset),
                                        (collections.Iterable, self.to_simple_iterable),
                                        (lambda v: v is None or v is True or v is False, self.to_simple_boolean),
                                        (lambda v: hasattr(v, 'to_simple') and not inspect.isclass(v),
@@ -97,12 +101,14 @@ class SmartTransformer(BaseTransformer):
         return getattr(self.resource._meta, name, None)
 
     @staticmethod
-    def init_options(fields=None, include=None, exclude=None, related=None):
+    def init_options(fields=None, include=None, exclude=None, related=None,
+                     fieldset=None):
         options = dict(
             fields=set(as_tuple(fields)),
             include=set(as_tuple(include)),
             exclude=set(as_tuple(exclude)),
             related=related or {},
+            fieldset=fieldset,
         )
         return options
 
@@ -134,6 +140,112 @@ class SmartTransformer(BaseTransformer):
         """(None, True, False)"""
         return value
 
+    def to_simple_queryset(self, value, **options):
+        """(django.db.models.query.QuerySet)"""
+        fields = self.get_values_fields(value, **options)
+        if fields is None:
+            return self.to_simple_iterable(value, **options)
+        return list(self.to_simple_values(value, fields))
+
+    def get_values_fields(self, queryset, **options):
+        """ Get fields for serialization of queryset from `values_list`.
+        Fast path is possible when models would be serialized only from
+        values of their fields (no custom simplificators, hooks and
+        related options).
+
+        :return list: names of fields or None
+
+        """
+        if queryset._result_cache is not None or \
+                isinstance(queryset, ValuesQuerySet) or \
+                queryset._prefetch_related_lookups or \
+                self.custom_simplificators or options.get('related'):
+            return None
+
+        model = queryset.model
+        if hasattr(model, 'to_simple'):
+            return None
+
+        # Ensure that the values implementation matches models one
+        owner = lambda name: [
+            cls for cls in type(self).__mro__ if name in cls.__dict__][0]
+        if not issubclass(
+                owner('to_simple_values'), owner('to_simple_model')):
+            return None
+
+        options = self.init_options(**options)
+        fields = dict((f.name, f) for f in model._meta.fields)
+        default_fields = set(f.name for f in fields.values() if f.serialize)
+        serialized_fields = options['fields'] or (
+            default_fields | options['include']) - options['exclude']
+        if options['fieldset']:
+            serialized_fields = serialized_fields & options['fieldset']
+
+        for fname in serialized_fields:
+            if not fname in fields or \
+                    self.get_column_type(fields[fname]) is None or \
+                    hasattr(self.resource, 'to_simple__{0}'.format(fname)):
+                return None
+
+        return list(serialized_fields)
+
+    @staticmethod
+    def get_column_type(field):
+        """ Get type of field's values.
+
+        :return str: 'string', 'number', 'decimal', 'date' or None
+
+        """
+        if field.rel:
+            field = field.rel.get_related_field()
+
+        return COLUMN_TYPES.get(field.get_internal_type())
+
+    def get_column_converter(self, field):
+        """ Get function for simplification of field's values.
+
+        :return function: converter
+
+        """
+        converter = dict(
+            string=smart_unicode,
+            number=None,
+            decimal=self.to_simple_number,
+            date=self.to_simple_dates,
+        )[self.get_column_type(field)]
+
+        if converter and field.null:
+            return lambda v: v if v is None else converter(v)
+
+        return converter
+
+    def to_simple_values(self, queryset, fields):
+        """ Convert queryset to simple python structure by `values_list`.
+
+        :return list: list of dicts
+
+        """
+        return self.convert_rows(
+            queryset.model, fields, queryset.values_list(*fields))
+
+    def convert_rows(self, model, fields, rows):
+        """ Convert rows of values by columns' converters.
+
+        :return generator: dicts
+
+        """
+        converters = [
+            (i, self.get_column_converter(model._meta.get_field(name)))
+            for i, name in enumerate(fields)]
+        converters = [(i, c) for i, c in converters if c]
+
+        for row in rows:
+            if converters:
+                row = list(row)
+                for i, converter in converters:
+                    row[i] = converter(row[i])
+            yield dict(zip(fields, row))
+
     def prepare_rules(self, default_simplificators, custom_simplificators):
         """Merge simplificators
 
@@ -191,6 +303,10 @@ class SmartTransformer(BaseTransformer):
                               if field.serialize])
         serialized_fields = fields or (default_fields | include) - exclude
 
+        # Respect fields requested by client
+        if options['fieldset']:
+            serialized_fields = serialized_fields & options['fieldset']
+
         for fname in serialized_fields:
 
             # Respect `to_simple__<fname>`
@@ -222,6 +338,72 @@ class SmartTransformer(BaseTransformer):
         return result
 
 
+def plan_related(resource, model, transformer=SmartTransformer, prefix='',
+                 prefetch=False, **options):
+    """ Plan loading of relations which will be serialized by transformer
+    for the model with options (fields, include, exclude, related).
+
+    :return list: pairs (lookup, is prefetch lookup)
+
+    """
+    options = transformer.init_options(**options)
+
+    default_fields = set(f.name for f in model._meta.fields if f.serialize)
+    names = options['fields'] or (
+        default_fields | options['include']) - options['exclude']
+
+    fields = dict((f.name, f) for f in model._meta.fields)
+    many = dict((f.name, f.rel.to) for f in model._meta.many_to_many)
+    many.update(
+        (r.get_accessor_name(), r.model)
+        for r in model._meta.get_all_related_objects() +
+        model._meta.get_all_related_many_to_many_objects()
+        if not r.field.unique)
+
+    plan = []
+    for name in sorted(names):
+        if hasattr(resource, 'to_simple__{0}'.format(name)):
+            continue
+
+        related = options['related'].get(name)
+        if name in fields and fields[name].rel and related:
+            is_prefetch, related_model = prefetch, fields[name].rel.to
+
+        elif name in many:
+            is_prefetch, related_model = True, many[name]
+
+        else:
+            continue
+
+        lookup = prefix + name
+        plan.append((lookup, is_prefetch))
+        if not hasattr(related_model, 'to_simple'):
+            plan += plan_related(
+                resource, related_model, transformer=transformer,
+                prefix=lookup + '__', prefetch=is_prefetch,
+                **(related or dict()))
+
+    return plan
+
+
+#: Types of model fields for `values_list` serialization
+COLUMN_TYPES = dict(
+    (field, column_type)
+    for column_type, fields in (
+        ('number', ('AutoField', 'BigIntegerField', 'BooleanField',
+                    'FloatField', 'IntegerField', 'NullBooleanField',
+                    'PositiveIntegerField', 'PositiveSmallIntegerField',
+                    'SmallIntegerField')),
+        ('string', ('CharField', 'CommaSeparatedIntegerField', 'EmailField',
+                    'FilePathField', 'GenericIPAddressField',
+                    'IPAddressField', 'SlugField', 'TextField', 'URLField')),
+        ('decimal', ('DecimalField',)),
+        ('date', ('DateField', 'DateTimeField', 'TimeField')),
+    )
+    for field in fields
+)
+
+
 class SmartDjangoTransformer(SmartTransformer):
     """ Smart transformer for django framework
     """
@@ -240,12 +422,28 @@ class SmartDjangoTransformer(SmartTransformer):
                 "model": self.get_model_name(instance),
                 "pk":  self.get_pk(instance)}
 
+    def to_simple_values(self, queryset, fields):
+        """ Make dicts structure from queryset by `values_list`
+
+        :return: list of dicts
+        """
+        model_name = smart_unicode(queryset.model._meta)
+        rows = list(queryset.values_list('pk', *fields))
+        pks = [smart_unicode(row[0], strings_only=True) for row in rows]
+        values = self.convert_rows(
+            queryset.model, fields, (row[1:] for row in rows))
+
+        return [{"fields": v, "model": model_name, "pk": pk}
+                for pk, v in zip(pks, values)]
+
     def get_model_name(self, instance):
         """ Get model name to display
 
         :param model: :class:``django.db.models.Model`` instance
         :return: mode name as string
         """
+        if instance._deferred:
+            return smart_unicode(instance._meta.proxy_for_model._meta)
         return smart_unicode(instance._meta)
 
     def get_pk(self, instance):
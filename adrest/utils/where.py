@@ -0,0 +1,260 @@
+""" Filter expressions.
+
+Expression combines filters with boolean operators and ranges::
+
+    GET /book/?adr-where=(status:draft|status:review);price:[10,20)
+
+Syntax:
+
+    ``key:value``       filter as in query params (`name__icontains:jo`)
+    ``key:"va|ue"``     quoted value (`\\"` and `\\\\` are escaped)
+    ``key:[a,b)``       range, brackets include bounds, parentheses exclude
+                        them, `*` is an open bound (`price:(10,*]`)
+    ``a|b``             or
+    ``a&b``, ``a;b``    and (`;` doesn't need escaping in URLs)
+    ``!a``              not
+    ``(...)``           grouping
+
+Expressions are limited by length (`MAX_LENGTH`) and nesting depth
+(`MAX_DEPTH`). Parsed expressions are cached by their strings. Expressions are compiled
+to `Q` objects by filter schema of a resource (see `adrest.utils.filters`).
+
+"""
+from django.db.models import Q
+
+from .exceptions import HttpError
+from .filters import LOOKUP_SEP, parse_filter
+from .status import HTTP_400_BAD_REQUEST
+
+
+__all__ = 'parse_where', 'compile_where'
+
+
+# Maximum number of cached expressions
+CACHE_SIZE = 1000
+
+# Parsed expressions by strings
+CACHE = dict()
+
+# Limits of expressions
+MAX_LENGTH = 2000
+MAX_DEPTH = 32
+
+SPECIAL = '|&;!():'
+
+
+class WhereError(ValueError):
+
+    """ Syntax error in expression. """
+
+    def __init__(self, message, position):
+        super(WhereError, self).__init__(
+            "%s at position %s" % (message, position))
+
+
+class Parser(object):
+
+    """ Recursive descent parser of expressions.
+
+    Parsed nodes are tuples:
+
+        ('or', [node, ...])
+        ('and', [node, ...])
+        ('not', node)
+        ('filter', key, value)
+        ('range', key, (lower, inclusive), (upper, inclusive))
+
+    """
+
+    def __init__(self, source):
+        self.source, self.pos, self.depth = source, 0, 0
+
+    def parse(self):
+        if len(self.source) > MAX_LENGTH:
+            self.error("Expression is too long")
+
+        node = self.parse_or()
+        self.skip()
+        if self.pos < len(self.source):
+            self.error("Unexpected '%s'" % self.source[self.pos])
+        return node
+
+    def error(self, message):
+        raise WhereError(message, self.pos)
+
+    def skip(self):
+        while self.pos < len(self.source) and self.source[self.pos].isspace():
+            self.pos += 1
+
+    def peek(self):
+        self.skip()
+        return self.source[self.pos:self.pos + 1]
+
+    def expect(self, char):
+        if self.peek() != char:
+            self.error("Expected '%s'" % char)
+        self.pos += 1
+
+    def parse_or(self):
+        nodes = [self.parse_and()]
+        while self.peek() == '|':
+            self.pos += 1
+            nodes.append(self.parse_and())
+        return nodes[0] if len(nodes) == 1 else ('or', nodes)
+
+    def parse_and(self):
+        nodes = [self.parse_not()]
+        while self.peek() in ('&', ';'):
+            self.pos += 1
+            nodes.append(self.parse_not())
+        return nodes[0] if len(nodes) == 1 else ('and', nodes)
+
+    def parse_not(self):
+        char = self.peek()
+        if not char in ('!', '('):
+            return self.parse_filter()
+
+        self.depth += 1
+        if self.depth > MAX_DEPTH:
+            self.error("Expression is nested too deeply")
+
+        self.pos += 1
+        if char == '!':
+            node = 'not', self.parse_not()
+
+        else:
+            node = self.parse_or()
+            self.expect(')')
+
+        self.depth -= 1
+        return node
+
+    def parse_filter(self):
+        key = self.parse_word()
+        if not key:
+            self.error("Expected filter")
+        self.expect(':')
+
+        char = self.peek()
+        if char in ('[', '('):
+            return self.parse_range(key)
+
+        if char == '"':
+            return 'filter', key, self.parse_quoted()
+
+        value = self.parse_word()
+        if not value:
+            self.error("Expected value")
+        return 'filter', key, value
+
+    def parse_range(self, key):
+        lower_inclusive = self.source[self.pos] == '['
+        self.pos += 1
+
+        end = self.pos
+        while end < len(self.source) and not self.source[end] in '])':
+            end += 1
+        if end == len(self.source):
+            self.error("Unclosed range")
+
+        bounds = [b.strip() for b in self.source[self.pos:end].split(',')]
+        if len(bounds) != 2 or not all(bounds):
+            self.error("Range should have two bounds")
+
+        upper_inclusive = self.source[end] == ']'
+        self.pos = end + 1
+        lower, upper = [None if b == '*' else b for b in bounds]
+        return 'range', key, (lower, lower_inclusive), (upper, upper_inclusive)
+
+    def parse_word(self):
+        self.skip()
+        start = self.pos
+        while self.pos < len(self.source) and \
+                not self.source[self.pos] in SPECIAL and \
+                not self.source[self.pos].isspace():
+            self.pos += 1
+        return self.source[start:self.pos]
+
+    def parse_quoted(self):
+        self.pos += 1
+        chars = []
+        while self.pos < len(self.source):
+            char = self.source[self.pos]
+            self.pos += 1
+            if char == '"':
+                return ''.join(chars)
+
+            if char == '\\' and self.pos < len(self.source):
+                char = self.source[self.pos]
+                self.pos += 1
+            chars.append(char)
+
+        self.error("Unclosed quote")
+
+
+def parse_where(source):
+    """ Parse expression (parsed expressions are cached).
+
+    :return tuple: parsed node
+
+    """
+    node = CACHE.get(source)
+    if node is None:
+        try:
+            node = Parser(source).parse()
+        except WhereError, e:
+            raise HttpError(
+                "Invalid expression: %s" % e, status=HTTP_400_BAD_REQUEST)
+
+        if len(CACHE) >= CACHE_SIZE:
+            CACHE.clear()
+        CACHE[source] = node
+
+    return node
+
+
+def compile_where(node, schema, model, allowed=None):
+    """ Compile parsed expression to `Q` object. Filters are validated as
+    query params filters.
+
+    :return Q: query
+
+    """
+    kind = node[0]
+
+    if kind in ('or', 'and'):
+        queries = [compile_where(n, schema, model, allowed) for n in node[1]]
+        query = queries.pop(0)
+        for q in queries:
+            query = query | q if kind == 'or' else query & q
+        return query
+
+    if kind == 'not':
+        return ~compile_where(node[1], schema, model, allowed)
+
+    if kind == 'range':
+        key, query = node[1], Q()
+        compiled = schema.get(key)
+        if compiled and compiled[1] != 'exact':
+            raise HttpError(
+                "Range should be used without lookup: %s" % key,
+                status=HTTP_400_BAD_REQUEST)
+
+        for (value, inclusive), lookup in zip(node[2:], ('gt', 'lt')):
+            if value is not None:
+                query &= compile_filter(
+                    schema, model, LOOKUP_SEP.join(
+                        (key, inclusive and lookup + 'e' or lookup)),
+                    value, allowed)
+        return query
+
+    return compile_filter(schema, model, node[1], node[2], allowed)
+
+
+def compile_filter(schema, model, key, value, allowed):
+    " Compile single filter to `Q` object. "
+
+    path, value, exclude = parse_filter(
+        schema, model, key, [value], allowed=allowed)
+    query = Q(**{path: value})
+    return ~query if exclude else query
@@ -1,5 +1,7 @@
 """ Base request resource. """
 
+import hashlib
+from calendar import timegm
 from logging import getLogger
 
 try:
@@ -8,16 +10,24 @@ except ImportError:
     from django.conf.urls.defaults import url
 
 from django.core.exceptions import ValidationError
-from django.http import HttpResponse
+from django.db.models import Model
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, quote_etag
 from django.views.decorators.csrf import csrf_exempt
 from django.views.generic import View
 
 from .mixin import auth, emitter, handler, parser, throttle, transformer
+from .mixin.dynamic import LOOKUP_SEP
 from .settings import ADREST_CONFIG
 from .signals import api_request_started, api_request_finished
 from .utils import status
+from .utils.cache import cache, get_generations, watch
 from .utils.exceptions import HttpError, FormError
+from .utils.auth import AbstractAuthenticator
 from .utils.response import SerializedHttpResponse, DirtyHttpResponse
+from .utils.throttle import NullThrottle
+from .utils.timing import StageTimer, NULL_TIMER
 from .utils.tools import as_tuple, gen_url_name, gen_url_regex, fix_request, import_functions
 
 logger = getLogger('django.request')
@@ -27,6 +37,15 @@ __all__ = 'ResourceView',
 
 NOTIFIERS = import_functions(ADREST_CONFIG['NOTIFIERS'])
 LOG_HANDLERS = import_functions(ADREST_CONFIG['LOG_HANDLERS'])
+TIMING_COLLECTORS = import_functions(ADREST_CONFIG['TIMING_COLLECTORS'])
+
+
+def is_redefined(cls, name, base):
+    " Check that the class redefines the base's method. "
+
+    method, default = getattr(cls, name), getattr(base, name)
+    return getattr(method, 'im_func', method) is not \
+        getattr(default, 'im_func', default)
 
 
 class ResourceMetaClass(
@@ -57,8 +76,57 @@ class ResourceMetaClass(
         cls._meta.url_regex = cls._meta.url_regex or '/'.join(
             gen_url_regex(cls))
 
+        # Compile the dispatch pipeline
+        cls._meta.stages = frozenset(mcs.__prepare_stages(cls))
+
+        # Invalidate cached responses when the models are changed
+        if cls._meta.cache:
+            cls._meta.cache_models = [
+                r._meta.model for r in cls._meta.parents + [cls]
+                if r._meta.model]
+            watch(*cls._meta.cache_models)
+
         return cls
 
+    @staticmethod
+    def __prepare_stages(cls):
+        """ Collect optional dispatch stages which do something for the
+        resource. Stages which are doing nothing are skipped in dispatch.
+
+        """
+        # Resource's own methods replace defaults of adrest mixins
+        base = globals().get('ResourceView', cls)
+
+        if not issubclass(cls._meta.throttle, NullThrottle) or \
+                is_redefined(cls, 'throttle_check', base):
+            yield 'throttle_check'
+
+        if cls._meta.parent and not cls._meta.allow_public_access or \
+                is_redefined(cls, 'check_owners', base):
+            yield 'check_owners'
+
+        if any(a.test_rights is not AbstractAuthenticator.test_rights
+               for a in cls._meta.authenticators) or \
+                is_redefined(cls, 'check_rights', base):
+            yield 'check_rights'
+
+        if ADREST_CONFIG['NOTIFY_ERRORS'] and (
+                NOTIFIERS or is_redefined(cls, 'notify_errors', base)):
+            yield 'notify_errors'
+
+        if cls._meta.log and (
+                LOG_HANDLERS or is_redefined(cls, 'log_call', base)):
+            yield 'log_call'
+
+        if cls._meta.etag or cls._meta.last_modified:
+            yield 'conditional'
+
+        if cls._meta.cache:
+            yield 'cache'
+
+        if cls._meta.server_timing or TIMING_COLLECTORS:
+            yield 'timing'
+
 
 class ResourceView(
     handler.HandlerMixin, throttle.ThrottleMixin, transformer.TransformerMixin,
@@ -101,6 +169,18 @@ class ResourceView(
         # allow to get this object (default: True)
         allow_public_access = False
 
+        # Send dispatch stages timings in `Server-Timing` header
+        server_timing = ADREST_CONFIG['SERVER_TIMING']
+
+        # Cache emitted responses of GET requests.
+        # Set timeout in seconds or `True` for default cache timeout.
+        # Cached responses are invalidated when the resource's model
+        # or models of parents are changed.
+        cache = None
+
+        # Cache responses for each authenticated identifier separately
+        cache_per_identifier = False
+
     @csrf_exempt
     def dispatch(self, request, **resources):
         """ Try to dispatch the request.
@@ -116,65 +196,139 @@ class ResourceView(
         self.identifier = request.META.get('REMOTE_ADDR', 'anonymous')
 
         # Send ADREST started signal
-        api_request_started.send(self, request=request)
+        if api_request_started.receivers:
+            api_request_started.send(self, request=request)
 
         # Send current api started signal
-        if self.api:
+        if self.api and self.api.request_started.receivers:
             self.api.request_started.send(self, request=request)
 
+        stages = self._meta.stages
+        timer = StageTimer() if 'timing' in stages else NULL_TIMER
+        validators = cache_key = None
+
         try:
 
             # Check request method
             self.check_method_allowed(request)
 
             # Authentificate
-            self.authenticate(request)
+            with timer('authenticate'):
+                self.authenticate(request)
 
             # Throttle check
-            self.throttle_check()
+            if 'throttle_check' in stages:
+                with timer('throttle_check'):
+                    self.throttle_check()
 
             if request.method != 'OPTIONS' or not ADREST_CONFIG['ALLOW_OPTIONS']:
 
                 # Parse content
-                request.data = self.parse(request)
+                with timer('parse'):
+                    request.data = self.parse(request)
 
                 # Get required resources
-                resources = self.get_resources(
-                    request, **resources)
+                with timer('get_resources'):
+                    resources = self.get_resources(
+                        request, **resources)
 
                 # Check owners
-                self.check_owners(request, **resources)
+                if 'check_owners' in stages:
+                    with timer('check_owners'):
+                        self.check_owners(request, **resources)
 
                 # Check rights for resources with this method
-                self.check_rights(resources, request=request)
-
-            # Return ``HttpResponse``, raise error or object
-            response = self.handle_request(request, **resources)
-
-            # Simplify response objects
-            response = self.transform(response, request=request)
-
-            # Serialize and apply emitter by content type
-            response = self.emit(response, request=request)
+                if 'check_rights' in stages:
+                    with timer('check_rights'):
+                        self.check_rights(resources, request=request)
+
+                # Calculate validators for conditional GET
+                if 'conditional' in stages and request.method in (
+                        'GET', 'HEAD'):
+                    with timer('validators'):
+                        validators = self.get_validators(
+                            request, **resources)
+
+                # Generate key for cached response
+                if 'cache' in stages and request.method == 'GET':
+                    with timer('cache_key'):
+                        cache_key = self.get_cache_key(request)
+
+            response = None
+            if validators and self.is_not_modified(request, *validators):
+                response = HttpResponseNotModified()
+
+            elif cache_key:
+                with timer('cache'):
+                    response = self.get_cached_response(cache_key)
+
+            if response is None:
+                # Return ``HttpResponse``, raise error or object
+                with timer('handle_request'):
+                    response = self.handle_request(request, **resources)
+
+                if request.method == 'HEAD' and \
+                        isinstance(response, HttpResponse):
+                    response['Content-Type'] = self.determine_emitter(
+                        request).media_type
+
+                else:
+                    # Simplify response objects
+                    with timer('transform'):
+                        response = self.transform(response, request=request)
+
+                    # Serialize and apply emitter by content type
+                    with timer('emit'):
+                        response = self.emit(response, request=request)
+
+                if cache_key:
+                    self.cache_response(cache_key, response)
 
         except Exception as e:
+            validators = None
             response = self.handle_exception(e, request=request)
 
+        if validators and response.status_code in (200, 304):
+            etag, last_modified = validators
+            if etag:
+                response['ETag'] = quote_etag(etag)
+            if last_modified:
+                response['Last-Modified'] = http_date(
+                    timegm(last_modified.utctimetuple()))
+
         response["Allow"] = ', '.join(self._meta.allowed_methods)
-        response["Vary"] = 'Authenticate, Accept'
+        patch_vary_headers(response, ('Authenticate', 'Accept'))
 
         # Notify about errors
-        self.notify_errors(request, response)
+        if 'notify_errors' in stages:
+            self.notify_errors(request, response)
 
         # Save request to log handlers
-        self.log_call(self, request=request, response=response, **resources)
+        if 'log_call' in stages:
+            with timer('log_call'):
+                self.log_call(
+                    self, request=request, response=response, **resources)
+
+        # Compress logged and cached content
+        if self._meta.emit_compress:
+            with timer('compress'):
+                response = self.compress(response, request=request)
+
+        # Send stages timings
+        if 'timing' in stages:
+            if self._meta.server_timing:
+                response['Server-Timing'] = timer.to_header()
+
+            for collector in TIMING_COLLECTORS:
+                collector(self, request, response, timer.timings)
 
         # Send finished signal
-        api_request_finished.send(
-            self, request=request, response=response, **resources)
+        if api_request_finished.receivers:
+            api_request_finished.send(
+                self, request=request, response=response, **resources)
 
         # Send finished signal in API context
-        if self.api:
+        if self.api and self.api.request_finished.receivers:
             self.api.request_finished.send(
                 self, request=request, response=response, **resources)
 
@@ -183,8 +337,8 @@ class ResourceView(
     def check_owners(self, request, **resources):
         """ Check parents of current resource.
 
-        Recursive scanning of the fact that the child has FK
-        to the parent and in resources we have right objects.
+        Check that the child has FK to the parent and in resources we have
+        right objects.
 
         We check that in request like /author/1/book/2/page/3
 
@@ -192,30 +346,124 @@ class ResourceView(
         with pk=2 and Book with pk=2 has ForeignKey field linked to Author
         object with pk=1.
 
+        Relations of loaded objects are checked by their foreign keys,
+        otherwise the whole chain is checked by one query which joins the
+        hierarchy (`Page.objects.filter(pk=3, book=2, book__author=1)`).
+
         :return bool: If success else raise Exception
 
         """
+        model, pks, path, lookups = None, None, [], dict()
+
+        resource = type(self)
+        while resource._meta.parent and not resource._meta.allow_public_access:
+            parent = resource._meta.parent
+            objects = resources.get(resource._meta.name)
+
+            if not resource._meta.model or not parent._meta.model or \
+                    not objects:
+                # The chain is broken, check collected part
+                self.__check_chain(model, pks, lookups)
+                model, path, lookups = None, [], dict()
+
+            else:
+                owner = resources.get(parent._meta.name)
+                if not owner:
+                    # 403 Error if there is error in parent-children
+                    # relationship
+                    raise HttpError(
+                        "Access forbidden.", status=status.HTTP_403_FORBIDDEN)
+
+                relation = \
+                    resource._meta.parent_relation_name or parent._meta.name
+
+                if model is None and isinstance(objects, Model) and \
+                        isinstance(owner, Model):
+                    if getattr(objects, "%s_id" % relation, None) != owner.pk:
+                        raise HttpError(
+                            "Access forbidden.",
+                            status=status.HTTP_403_FORBIDDEN)
+
+                else:
+                    if model is None:
+                        model, pks = resource._meta.model, set(
+                            getattr(o, 'pk', o) for o in as_tuple(objects))
+
+                    path.append(relation)
+                    lookups[LOOKUP_SEP.join(path)] = getattr(
+                        owner, 'pk', owner)
+
+            resource = parent
+
+        self.__check_chain(model, pks, lookups)
+        return True
+
+    @staticmethod
+    def __check_chain(model, pks, lookups):
+        " Check relations of objects by one query. "
 
-        if self._meta.allow_public_access or not self._meta.parent:
+        if model is None:
             return True
 
-        self.parent.check_owners(request, **resources)
+        try:
+            if model._default_manager.filter(
+                    pk__in=pks, **lookups).count() == len(pks):
+                return True
+        except (ValueError, TypeError):
+            pass
 
-        objects = resources.get(self._meta.name)
-        if self._meta.model and self._meta.parent._meta.model and objects:
-            relation_field_name = self._meta.parent_relation_name or self._meta.parent._meta.name
-            pr = resources.get(relation_field_name)
-            check = all(
-                pr.pk == getattr(
-                    o, "%s_id" % relation_field_name, None)
-                for o in as_tuple(objects))
+        raise HttpError("Access forbidden.", status=status.HTTP_403_FORBIDDEN)
 
-            if not pr or not check:
-                # 403 Error if there is error in parent-children relationship
-                raise HttpError(
-                    "Access forbidden.", status=status.HTTP_403_FORBIDDEN)
+    def get_cache_key(self, request):
+        """ Generate cache key for the request's response.
 
-        return True
+        Key depends on path, query string, emitter's media type,
+        generations of the resource's models and (optionally)
+        identifier.
+
+        :return str: cache key
+
+        """
+        bits = [
+            request.path,
+            sorted(request.GET.lists()),
+            self.determine_emitter(request).media_type,
+            get_generations(*self._meta.cache_models),
+        ]
+        if self._meta.cache_per_identifier:
+            bits.append(self.identifier)
+
+        return 'adrest:response:%s' % hashlib.md5(repr(bits)).hexdigest()
+
+    @staticmethod
+    def get_cached_response(cache_key):
+        """ Get response from cache.
+
+        :return django.http.HttpResponse: response or None
+
+        """
+        cached = cache.get(cache_key)
+        if cached is None:
+            return None
+
+        status_code, content, headers = cached
+        response = HttpResponse(content, status=status_code)
+        for header, value in headers:
+            response[header] = value
+
+        return response
+
+    def cache_response(self, cache_key, response):
+        """ Save successful response to cache. """
+
+        if response.status_code != status.HTTP_200_OK or \
+                getattr(response, 'streaming', False):
+            return False
+
+        timeout = None if self._meta.cache is True else self._meta.cache
+        cache.set(cache_key, (
+            response.status_code, response.content, response.items()),
+            timeout)
 
     def handle_exception(self, e, request=None):
         """ Handle code exception.
@@ -0,0 +1 @@
+""" ADRest benchmarks. """
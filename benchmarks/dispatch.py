@@ -0,0 +1,232 @@
+""" End-to-end dispatch benchmarks.
+
+Requests are built by :class:`adrest.tests.utils.AdrestRequestFactory` and
+dispatched to the test project's resources (``tests/core``, ``tests/main``
+and ``tests/rpc``) without the Django test client and middlewares.
+
+Timings depend on the machine, so the stored baseline is only a sample.
+Save a baseline locally (before your changes) first: ::
+
+    python -m benchmarks.dispatch --save benchmarks/baseline.json
+
+Then run benchmarks and compare them with the baseline: ::
+
+    python -m benchmarks.dispatch --compare benchmarks/baseline.json
+
+"""
+import platform
+import sys
+from logging import getLogger, NullHandler
+from collections import defaultdict
+from optparse import OptionParser
+from time import time
+
+from django.utils import simplejson
+
+# Configure Django
+import tests.test_adrest # nolint
+
+from django.conf import settings
+
+# Measure production mode (debug mode saves queries and checks query plans)
+settings.DEBUG = False
+
+from adrest.settings import ADREST_CONFIG
+
+# Collect stages timings (should be set before resources are created)
+ADREST_CONFIG['TIMING_COLLECTORS'] = ['benchmarks.dispatch.collect_timings']
+
+# Measure throttling cost without throttling
+ADREST_CONFIG['THROTTLE_AT'] = sys.maxint
+
+# Skip warnings about registration of the test project's resources
+getLogger('adrest').addHandler(NullHandler())
+
+
+STAGES = defaultdict(float)
+
+
+def collect_timings(resource, request, response, timings):
+    """ Sum durations of dispatch stages. """
+    for stage, duration in timings:
+        STAGES[stage] += duration
+
+
+def setup():
+    """ Create test database and fixtures.
+
+    :return dict: fixtures
+
+    """
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+    from mixer.backend.django import mixer
+
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+
+    pirates = mixer.cycle(200).blend('core.pirate', character='good')
+    boat = mixer.blend('core.boat', pirate=pirates[0])
+
+    author = mixer.blend('main.author')
+    book = mixer.blend('main.book', author=author)
+    mixer.cycle(20).blend('main.book', author=author)
+
+    root = mixer.blend('rpc.root')
+    mixer.cycle(20).blend('rpc.child', root=root)
+
+    return dict(pirate=pirates[0], boat=boat, author=author, book=book,
+                key=author.user.accesskey_set.get(), root=root)
+
+
+def scenarios(fixtures):
+    """ Representative calls.
+
+    :return list: (name, method, url name, url params, data, headers)
+
+    """
+    pirate, boat = fixtures['pirate'].pk, fixtures['boat'].pk
+    author, book = fixtures['author'].pk, fixtures['book'].pk
+    json = dict(HTTP_ACCEPT='application/json')
+
+    return [
+        ('get_anonymous', 'get', 'api-pirate', dict(pirate=pirate), None,
+         json),
+        ('get_accesskey', 'get', 'main-1.0.0-author-test-book-article',
+         dict(book=book), dict(author=author),
+         dict(HTTP_AUTHORIZATION=fixtures['key'].key)),
+        ('get_paginated', 'get', 'api-pirate', dict(), dict(page=2), json),
+        ('get_nested', 'get', 'api-pirate-boat',
+         dict(pirate=pirate, boat=boat), None, json),
+        ('post_form', 'post', 'api-pirate', dict(),
+         dict(name='John', character='evil'), json),
+        ('emit_json', 'get', 'api-pirate', dict(), dict(
+            character='good'), json),
+        ('emit_xml', 'get', 'api-1.0.0-root-child',
+         dict(root=fixtures['root'].pk), None,
+         dict(HTTP_ACCEPT='application/xml')),
+        ('emit_template', 'get', 'main-1.0.0-book', dict(), None,
+         dict(HTTP_ACCEPT='application/xml')),
+    ]
+
+
+def measure(number, method, url_name, params, data, headers):
+    """ Dispatch the call `number` times.
+
+    :return dict: requests per second, mean time and stages costs (ms)
+
+    """
+    from django.core.urlresolvers import reverse, resolve
+    from adrest.tests.utils import AdrestRequestFactory
+
+    rf = AdrestRequestFactory()
+    path = reverse(url_name, kwargs=params)
+    match = resolve(path)
+    make_request = getattr(rf, method)
+
+    # Warm up
+    for _ in xrange(max(number / 10, 1)):
+        match.func(make_request(path, data or {}, **headers), **match.kwargs)
+
+    STAGES.clear()
+    total = 0
+    for _ in xrange(number):
+        request = make_request(path, data or {}, **headers)
+        start = time()
+        response = match.func(request, **match.kwargs)
+        total += time() - start
+
+    if response.status_code >= 400:
+        raise AssertionError("%s returned %s: %s" % (
+            path, response.status_code, response.content))
+
+    return dict(
+        rps=round(number / total, 2),
+        mean_ms=round(total * 1000 / number, 4),
+        stages=dict(
+            (stage, round(duration * 1000 / number, 4))
+            for stage, duration in STAGES.items()),
+    )
+
+
+def compare(results, baseline, threshold):
+    """ Compare results with the baseline.
+
+    :return list: descriptions of regressions
+
+    """
+    regressions = []
+    for name, result in sorted(results['results'].items()):
+        base = baseline['results'].get(name)
+        if not base:
+            continue
+
+        change = result['rps'] / base['rps'] - 1
+        print "%-15s %10.2f rps %+7.1f%%" % (name, result['rps'], change * 100)
+        if change < -threshold:
+            regressions.append(name)
+
+    return regressions
+
+
+def main(argv=None):
+    """ Run benchmarks.
+
+    :return int: exit status
+
+    """
+    parser = OptionParser(usage="python -m benchmarks.dispatch [options]")
+    parser.add_option('-n', '--number', type='int', default=200,
+                      help="Requests per scenario [%default]")
+    parser.add_option('-o', '--output', help="Write JSON results to file")
+    parser.add_option('-s', '--save', help="Save results as a baseline")
+    parser.add_option('-c', '--compare', help="Compare with a baseline")
+    parser.add_option('-t', '--threshold', type='float', default=0.1,
+                      help="Allowed slowdown ratio [%default]")
+    parser.add_option('-k', '--scenario', action='append',
+                      help="Run only given scenarios")
+    options, _ = parser.parse_args(argv)
+
+    import django
+    from adrest import version
+
+    fixtures = setup()
+    results = dict(
+        adrest=version,
+        django=django.get_version(),
+        python=platform.python_version(),
+        number=options.number,
+        results=dict(),
+    )
+    for scenario in scenarios(fixtures):
+        name, params = scenario[0], scenario[1:]
+        if options.scenario and not name in options.scenario:
+            continue
+        results['results'][name] = measure(options.number, *params)
+
+    dump = simplejson.dumps(results, indent=2, sort_keys=True)
+    for path in filter(None, (options.output, options.save)):
+        with open(path, 'w') as f:
+            f.write(dump + '\n')
+
+    if not options.compare:
+        print dump
+        return 0
+
+    with open(options.compare) as f:
+        regressions = compare(results, simplejson.load(f), options.threshold)
+
+    if regressions:
+        print "Slower than baseline: %s" % ', '.join(regressions)
+        return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    # Import the module by name so the timings collector shares its state
+    from benchmarks.dispatch import main as run
+    sys.exit(run())
+
+
+# lint_ignore=W0404,W0612
@@ -23,7 +23,7 @@ class Island(models.Model):
 
     """ Magical islands. """
 
-    title = models.CharField(max_length=50)
+    title = models.CharField(max_length=50, unique=True)
 
 
 class Treasure(models.Model):
@@ -1,9 +1,14 @@
+import json
+
 from django.test import RequestFactory
 from django.views.generic import View
 from mixer.backend.django import mixer
 
 from ..api import api as API
 from adrest.mixin import DynamicMixin
+from adrest.utils.exceptions import HttpError
+from adrest.utils.transformers import BaseTransformer, SmartDjangoTransformer
+from adrest.views import ResourceView
 
 
 class CoreDynamicTest(API.testCase):
@@ -21,10 +26,17 @@ class CoreDynamicTest(API.testCase):
                 return self.get_collection(request, **resources)
 
         rf = RequestFactory()
+        queryset = SomeResource._meta.queryset
         resource = SomeResource()
 
+        # Class-level queryset is shared and never changed
+        self.assertTrue(resource._meta.queryset is queryset)
+        self.assertFalse(resource.get_queryset() is queryset)
+
         response = resource.dispatch(rf.get('/'))
         self.assertEqual(len(response), len(pirates))
+        self.assertTrue(SomeResource._meta.queryset is queryset)
+        self.assertTrue(queryset._result_cache is None)
 
         response = resource.dispatch(rf.get('/?name=' + pirates[0].name))
         self.assertEqual(list(response), [pirates[0]])
@@ -34,6 +46,217 @@ class CoreDynamicTest(API.testCase):
         self.assertEqual(list(response), sorted(
             pirates, key=lambda p: (p.name, p.captain)))
 
+    def test_filters(self):
+
+        island = mixer.blend('core.island')
+        john = mixer.blend('core.pirate', name='John', character='evil')
+        bill = mixer.blend('core.pirate', name='Bill', character='good')
+        mixer.blend('core.treasure', island=island, pirate=john)
+        mixer.blend('core.treasure', island=island, pirate=bill)
+        mixer.blend('core.treasure', island=island, pirate=None)
+
+        class PirateResource(DynamicMixin, View):
+
+            class Meta:
+                model = 'core.pirate'
+
+        class TreasureResource(DynamicMixin, View):
+
+            class Meta:
+                model = 'core.treasure'
+
+        schema = PirateResource._meta.filter_schema
+        self.assertTrue('name__icontains' in schema)
+        self.assertFalse('captain__icontains' in schema)
+        self.assertTrue(
+            'pirate__name__startswith' in TreasureResource._meta.filter_schema)
+
+        rf = RequestFactory()
+
+        def collection(resource, query):
+            return list(resource().get_collection(rf.get('/?' + query)))
+
+        self.assertEqual(
+            collection(PirateResource, 'name__icontains=JO'), [john])
+        self.assertEqual(collection(PirateResource, 'name__not=John'), [bill])
+        self.assertEqual(
+            len(collection(PirateResource, 'name=John&name=Bill')), 2)
+        self.assertEqual(collection(
+            PirateResource, 'name=Bill&name=Smith%2CJohn'), [bill])
+        self.assertEqual(len(collection(PirateResource, 'id__in=%s,%s' % (
+            john.pk, bill.pk))), 2)
+        self.assertEqual(collection(PirateResource, 'id__range=%s,%s' % (
+            bill.pk, bill.pk + 10)), [bill])
+        self.assertEqual(
+            collection(PirateResource, 'captain=0&character=good'), [bill])
+
+        self.assertEqual(
+            len(collection(TreasureResource, 'pirate__name=John')), 1)
+        self.assertEqual(
+            len(collection(TreasureResource, 'pirate__isnull=true')), 1)
+        self.assertEqual(len(collection(
+            TreasureResource, 'created_at__year=1990')), 0)
+        self.assertEqual(len(collection(
+            TreasureResource, 'island__title__not=%s' % island.title)), 0)
+
+        for query in ('name__megadeath=1', 'captain__icontains=1',
+                      'id=John', 'id__range=1'):
+            self.assertRaises(
+                HttpError, collection, PirateResource, query)
+
+        # Deep relations are cached out of the shared schema and limited
+        from adrest.utils import filters
+        from tests.main.models import Article
+
+        schema, key = filters.compile_schema(Article), \
+            'book__author__user__username'
+        size = len(schema)
+        self.assertEqual(filters.parse_filter(schema, Article, key, ['x']),
+                         (key, 'x', False))
+        self.assertEqual(len(schema), size)
+        self.assertTrue((Article, key) in filters.CACHE)
+
+        filters.CACHE.clear()
+        filters.MAX_RELATIONS = 2
+        try:
+            self.assertRaises(
+                HttpError, filters.parse_filter, schema, Article, key, ['x'])
+        finally:
+            filters.MAX_RELATIONS = 3
+
+    def test_allowed_filters(self):
+        from adrest.utils.filters import explain, check_plan
+        from ..models import Pirate, Treasure
+
+        class TreasureResource(DynamicMixin, View):
+
+            class Meta:
+                model = 'core.treasure'
+                filterable = 'indexed'
+                sortable = 'created_at', 'id'
+
+        self.assertEqual(TreasureResource._meta.allowed_filters[0],
+                         frozenset(['id', 'pirate', 'island']))
+
+        rf = RequestFactory()
+        resource = TreasureResource()
+        for query in ('pirate=1', 'island__in=1,2', 'adr-sort=-created_at'):
+            resource.get_collection(rf.get('/?' + query))
+
+        for query in ('created_at__year=2013', 'pirate__name=John',
+                      'pirate__gt=1&pirate__name__icontains=J',
+                      'adr-sort=pirate', 'adr-sort=?'):
+            self.assertRaises(
+                HttpError, resource.get_collection, rf.get('/?' + query))
+
+        self.assertTrue(explain(Treasure.objects.filter(pirate=1)))
+        self.assertTrue(check_plan(Treasure.objects.filter(pirate=1)))
+        self.assertFalse(check_plan(Pirate.objects.filter(name='John')))
+        self.assertEqual(
+            explain(Pirate.objects.extra(where=['unknown = 1'])), [])
+
+    def test_where(self):
+        from adrest.utils.where import parse_where, CACHE
+
+        john = mixer.blend('core.pirate', name='John', character='evil')
+        bill = mixer.blend('core.pirate', name='Bill', character='good')
+        jack = mixer.blend('core.pirate', name='Jack', character='sorrow')
+
+        class PirateResource(DynamicMixin, View):
+
+            class Meta:
+                model = 'core.pirate'
+
+        self.assertEqual(
+            parse_where('(name:a|!name:"b;c");id:[1,*)'), ('and', [
+                ('or', [
+                    ('filter', 'name', 'a'),
+                    ('not', ('filter', 'name', 'b;c'))]),
+                ('range', 'id', ('1', True), (None, False))]))
+        self.assertTrue('(name:a|!name:"b;c");id:[1,*)' in CACHE)
+
+        rf = RequestFactory()
+
+        def collection(where):
+            return list(PirateResource().get_collection(
+                rf.get('/', {'adr-where': where, 'adr-sort': 'id'})))
+
+        self.assertEqual(collection('name:John|name:Bill'), [john, bill])
+        self.assertEqual(
+            collection('(name:John|character:good) & !name__icontains:bi'),
+            [john])
+        self.assertEqual(collection('id:(%s,%s]' % (john.pk, jack.pk)),
+                         [bill, jack])
+        self.assertEqual(collection('id:[*,%s)' % bill.pk), [john])
+        self.assertEqual(collection('name:Jack;character__not:evil'), [jack])
+
+        for where in ('name:John|', '(name:John', 'name:', 'id:[1)',
+                      'megadeath:1', 'id:John', 'name__icontains:[a,b]',
+                      '!' * 2000 + 'name:a', '(' * 600 + 'name:a' + ')' * 600,
+                      'name:a|' * 1000 + 'name:a'):
+            self.assertRaises(HttpError, collection, where)
+
+    def test_search(self):
+        from django.db import connection
+        from ..models import Pirate
+
+        class SimpleResource(DynamicMixin, View):
+
+            class Meta:
+                model = 'core.pirate'
+                search_fields = 'name',
+
+        class SQLiteResource(DynamicMixin, View):
+
+            class Meta:
+                model = 'core.pirate'
+                search_fields = 'name', 'character'
+                search_backend = 'adrest.utils.search.SQLiteSearch'
+
+        # DDL commits transaction in SQLite, create the index before data
+        SQLiteResource._meta.search.ensure_table(connection)
+
+        mixer.blend('core.pirate', name='Jack Sparrow', character='good')
+        mixer.blend('core.pirate', name='Jack Rackham', character='evil')
+
+        rf = RequestFactory()
+        for resource in (SimpleResource(), SQLiteResource()):
+            self.assertEqual(len(resource.get_collection(
+                rf.get('/?adr-q=jack'))), 2)
+            self.assertEqual(len(resource.get_collection(
+                rf.get('/?adr-q=Jack&character=evil'))), 1)
+            self.assertEqual(len(resource.get_collection(
+                rf.get('/?adr-q=sparrow+jack&adr-sort=name'))), 1)
+
+        resource = SQLiteResource()
+        self.assertEqual(len(resource.get_collection(
+            rf.get('/?adr-q=spar'))), 1)
+        self.assertEqual(len(resource.get_collection(
+            rf.get('/?adr-q=evil'))), 1)
+
+        pirate = mixer.blend('core.pirate', name='Anne Bonny')
+        self.assertEqual(list(resource.get_collection(
+            rf.get('/?adr-q=anne'))), [pirate])
+
+        # Every set of fields has own index, search falls back to lookups
+        # until the index is created
+        from adrest.utils.search import SQLiteSearch
+        search = SQLiteSearch(Pirate, ('name',))
+        self.assertNotEqual(search.table, SQLiteResource._meta.search.table)
+        self.assertFalse(search.exists(connection))
+        self.assertEqual(len(search.search(Pirate.objects.all(), 'jack')), 2)
+
+        # Existence of index tables is memoized
+        pirate.name = 'Mary Read'
+        with self.assertNumQueries(4):
+            pirate.save()
+        self.assertFalse(resource.get_collection(rf.get('/?adr-q=anne')))
+        self.assertTrue(resource.get_collection(rf.get('/?adr-q=mary')))
+
+        pirate.delete()
+        self.assertFalse(resource.get_collection(rf.get('/?adr-q=mary')))
+        self.assertEqual(Pirate.objects.count(), 2)
+
     def test_pagination(self):
 
         pirates = mixer.cycle(3).blend('core.pirate')
@@ -61,4 +284,210 @@ class CoreDynamicTest(API.testCase):
         response = resource.dispatch(rf.get('/?adr-max=1'))
         self.assertEqual(len(response.resources), 1)
 
+    def test_collection_cache(self):
+        from adrest.utils.cache import CachedCollection
+
+        pirates = mixer.cycle(3).blend('core.pirate')
+
+        class SomeResource(DynamicMixin, View):
+
+            class Meta:
+                model = 'core.pirate'
+                limit_per_page = 2
+                collection_cache = True
+
+        rf = RequestFactory()
+        resource = SomeResource()
+
+        def page(query=''):
+            request = rf.get('/?adr-sort=id' + query)
+            response = resource.paginate(
+                request, resource.get_collection(request))
+            return response.count, list(response.resources)
+
+        collection = resource.get_collection(rf.get('/'))
+        self.assertTrue(isinstance(collection, CachedCollection))
+
+        self.assertEqual(page(), (3, pirates[:2]))
+
+        # Count and primary keys are cached, objects are loaded by pks
+        with self.assertNumQueries(1):
+            self.assertEqual(page(), (3, pirates[:2]))
+
+        self.assertEqual(page('&page=2'), (3, pirates[2:]))
+        self.assertEqual(page('&name__not=' + pirates[0].name)[0], 2)
+
+        # Changes of the model invalidate cache
+        pirates[0].delete()
+        self.assertEqual(page(), (2, pirates[1:]))
+
+        # And changes of related models used by filters
+        class TreasureResource(DynamicMixin, View):
+
+            class Meta:
+                model = 'core.treasure'
+                collection_cache = True
+
+        treasure = mixer.blend('core.treasure', pirate=pirates[1])
+        request = rf.get('/?pirate__name=' + pirates[1].name)
+        self.assertEqual(list(TreasureResource().get_collection(request)),
+                         [treasure])
+
+        pirates[1].name += ' Rackham'
+        pirates[1].save()
+        self.assertEqual(
+            list(TreasureResource().get_collection(request)), [])
+
+    def test_cursor_pagination(self):
+        from urlparse import urlparse
+        from adrest.utils.paginator import CursorPaginator
+
+        pirates = [mixer.blend('core.pirate', name=name) for name in (
+            'Bill', 'Jack', 'John', 'Jack', 'Bill')]
+
+        class SomeResource(DynamicMixin, View):
+
+            class Meta:
+                model = 'core.pirate'
+                limit_per_page = 2
+                pagination = 'cursor'
+
+        rf = RequestFactory()
+        resource = SomeResource()
+
+        def page(url):
+            request = rf.get(url)
+            return resource.paginate(
+                request, resource.get_collection(request))
+
+        def follow(link):
+            url = urlparse(link)
+            return page('%s?%s' % (url.path, url.query))
+
+        first = page('/?adr-sort=-name')
+        self.assertTrue(isinstance(first, CursorPaginator))
+        self.assertEqual(first.resources, [pirates[2], pirates[3]])
+        self.assertFalse(first.previous_page)
+        self.assertTrue('adr-sort=-name' in first.next_page)
+
+        # Equal names are ordered by primary key
+        second = follow(first.next_page)
+        self.assertEqual(second.resources, [pirates[1], pirates[4]])
+
+        # One query per page without counting
+        last = follow(second.next_page)
+        with self.assertNumQueries(1):
+            self.assertEqual(last.resources, [pirates[0]])
+        self.assertFalse(last.next_page)
+
+        previous = follow(last.previous_page)
+        self.assertEqual(previous.resources, second.resources)
+        self.assertEqual(
+            follow(previous.previous_page).resources, first.resources)
+        self.assertFalse(follow(previous.previous_page).previous_page)
+
+        self.assertEqual(first.to_simple(), dict(
+            next=first.next_page, prev='', resources=first.resources))
+
+        for url in ('/?cursor=invalid', '/?adr-sort=name&cursor=%s' % (
+                urlparse(first.next_page).query.split('cursor=')[1])):
+            self.assertRaises(HttpError, lambda: page(url).resources)
+
+        # Nullable fields can't be used for cursors
+        from ..models import Pirate
+        field = Pirate._meta.get_field('name')
+        field.null = True
+        try:
+            self.assertRaises(HttpError, page, '/?adr-sort=name')
+        finally:
+            field.null = False
+
+    def test_fieldset(self):
+
+        pirate = mixer.blend('core.pirate')
+
+        class SomeResource(ResourceView):
+
+            class Meta:
+                model = 'core.pirate'
+                transformers = SmartDjangoTransformer
+
+        rf = RequestFactory()
+        resource = SomeResource()
+
+        request = rf.get('/?adr-fields=name,captain')
+        self.assertEqual(resource.get_fieldset(request),
+                         frozenset(['name', 'captain']))
+        self.assertEqual(
+            resource.get_projection(request), ['captain', 'name'])
+        self.assertFalse(resource.get_fieldset(rf.get('/')))
+        self.assertFalse(
+            resource.get_projection(rf.get('/?adr-fields=name,unknown')))
+
+        class BaseResource(SomeResource):
+
+            class Meta:
+                transformers = BaseTransformer
+
+        self.assertFalse(BaseResource().get_projection(request))
+
+        collection = resource.get_collection(request)
+        self.assertEqual(
+            collection.query.deferred_loading,
+            (set(['captain', 'name']), False))
+
+        view = SomeResource.as_view()
+        response = view(request)
+        simple = json.loads(response.content)
+        pirate_ = simple['resources'][0]
+        self.assertEqual(pirate_['model'], 'core.pirate')
+        self.assertEqual(sorted(pirate_['fields']), ['captain', 'name'])
+
+        response = view(rf.get('/?adr-fields=name'), pirate=pirate.pk)
+        simple = json.loads(response.content)
+        self.assertEqual(simple['fields'], dict(name=pirate.name))
+
+    def test_related_plan(self):
+
+        for pirate in mixer.cycle(3).blend('core.pirate'):
+            mixer.cycle(2).blend('core.boat', pirate=pirate)
+            mixer.blend('core.treasure', pirate=pirate)
+
+        class PirateResource(ResourceView):
+
+            class Meta:
+                model = 'core.pirate'
+                emit_include = 'boat_set'
+                emit_related = dict(boat_set=dict(
+                    fields=['title', 'pirate'],
+                    related=dict(pirate=dict(fields=['name']))))
+
+        class TreasureResource(ResourceView):
+
+            class Meta:
+                model = 'core.treasure'
+                select_related = 'island'
+                emit_related = dict(pirate=dict(fields=['name']))
+
+        self.assertEqual(PirateResource._meta.select_related, [])
+        self.assertEqual(PirateResource._meta.prefetch_related,
+                         ['boat_set', 'boat_set__pirate'])
+        self.assertEqual(
+            TreasureResource._meta.select_related, ['island', 'pirate'])
+
+        rf = RequestFactory()
+        for cls, queries in ((PirateResource, 2), (TreasureResource, 1)):
+            resource = cls()
+            request = rf.get('/')
+            collection = resource.get_collection(request)
+            with self.assertNumQueries(queries):
+                simple = resource.transform(collection, request=request)
+            self.assertEqual(len(simple), 3)
+
+        self.assertEqual(simple[0]['pirate'].keys(), ['name'])
+
+        request = rf.get('/?adr-fields=island')
+        collection = TreasureResource().get_collection(request)
+        self.assertEqual(collection.query.select_related, dict(island={}))
+
 # lint_ignore=C0110,E1103
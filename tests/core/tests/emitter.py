@@ -1,5 +1,9 @@
 """ Tests ADRest emitter mixin.
 """
+import zlib
+
+from django.http import StreamingHttpResponse
+from django.test.client import RequestFactory
 from django.views.generic import View
 
 from ..api import api as API
@@ -73,5 +77,70 @@ class CoreEmitterTest(AdrestTestCase):
         response = resource.emit(resource.transform(pirate))
         self.assertTrue('Evil ' + pirate.name in response.content)
 
+    def test_compress(self):
+        """ Test response compression. """
+
+        mixer.cycle(20).blend('core.pirate')
+
+        class Resource(View, EmitterMixin):
+
+            class Meta:
+                model = 'core.pirate'
+                emit_compress = True
+
+            def transform(self, content, request=None):
+                return SmartTransformer(self, content, request).transform()
+
+        from ..models import Pirate
+
+        resource = Resource()
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+        content = resource.transform(Pirate.objects.all())
+        plain = resource.emit(content)
+        self.assertFalse(plain.has_header('Content-Encoding'))
+
+        self.assertFalse(resource.emit(content, request=request).has_header(
+            'Content-Encoding'))
+        response = resource.compress(
+            resource.emit(content, request=request), request=request)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertTrue('Accept-Encoding' in response['Vary'])
+        self.assertEqual(
+            zlib.decompress(response.content, 16 + zlib.MAX_WBITS),
+            plain.content)
+
+        request = RequestFactory().get(
+            '/', HTTP_ACCEPT_ENCODING='gzip;q=0, identity')
+        response = resource.compress(
+            resource.emit(content, request=request), request=request)
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='*')
+        response = resource.compress(
+            StreamingHttpResponse(iter(['a' * 10] * 10)), request=request)
+        self.assertTrue(response.has_header('Content-Encoding'))
+        if response['Content-Encoding'] == 'gzip':
+            self.assertEqual(zlib.decompress(
+                ''.join(response.streaming_content), 16 + zlib.MAX_WBITS),
+                'a' * 100)
+
+        # Resources log and cache uncompressed content
+        from adrest.models import Access
+        from adrest.views import ResourceView
+
+        class PirateResource(ResourceView):
+
+            class Meta:
+                model = 'core.pirate'
+                emit_compress = True
+                limit_per_page = 0
+
+        response = PirateResource.as_view()(RequestFactory().get(
+            '/', HTTP_ACCEPT_ENCODING='gzip'))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        access = Access.objects.latest('id')
+        self.assertEqual(access.response, zlib.decompress(
+            response.content, 16 + zlib.MAX_WBITS)[:5000].decode('utf-8'))
+
 
 # lint_ignore=W0212,E0102,C0110
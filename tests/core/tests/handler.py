@@ -8,6 +8,8 @@ from django.test import RequestFactory
 from mixer.backend.django import mixer
 
 from adrest.mixin import HandlerMixin
+from adrest.utils.exceptions import FormError, HttpError
+from adrest.views import ResourceView
 from ..api import api as API
 
 
@@ -138,5 +140,284 @@ class CoreHandlerTest(API.testCase):
         for p in response.json:
             self.assertEqual(p['fields']['character'], 'sorrow')
 
+    def test_post_list(self):
+        from ..models import Pirate
+
+        response = self.post_resource('pirate', data=[
+            dict(name='John', character='evil'),
+            dict(name='Billy', character='good'),
+        ], json=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json), 2)
+        self.assertTrue(all(p['pk'] for p in response.json))
+        self.assertEqual(
+            sorted(Pirate.objects.values_list('name', flat=True)),
+            ['Billy', 'John'])
+
+        # Nothing is created when any item is invalid
+        response = self.post_resource('pirate', data=[
+            dict(name='Tom', character='good'),
+            dict(name='Jack', character='unknown'),
+        ], json=True)
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue('character' in response.json['errors']['1'])
+        self.assertFalse(Pirate.objects.filter(name='Tom').exists())
+
+        class Resource(HandlerMixin, View):
+
+            class Meta:
+                model = 'core.pirate'
+                bulk_create = True
+                bulk_chunk_size = 2
+
+        request = RequestFactory().post('/')
+        request.data = [dict(name='Pirate %s' % n, character='evil')
+                        for n in range(5)]
+        with self.assertNumQueries(3):
+            created = Resource().post(request)
+        self.assertEqual(len(created), 5)
+        self.assertEqual(Pirate.objects.count(), 7)
+
+    def test_validator(self):
+        from django.contrib.auth.models import Permission
+        from ..models import Pirate
+
+        class Resource(HandlerMixin, View):
+
+            class Meta:
+                allowed_methods = 'get', 'post', 'put'
+                model = 'core.pirate'
+                validator = True
+
+        self.assertEqual(
+            sorted(Resource._meta.form.fields),
+            ['captain', 'character', 'name'])
+
+        resource = Resource()
+        request = RequestFactory().post('/')
+        request.data = dict(name='John', character='evil')
+        pirate = resource.post(request)
+        self.assertTrue(pirate.pk)
+        self.assertEqual(pirate.name, 'John')
+        self.assertFalse(pirate.captain)
+
+        request.data = dict(name='John', character='unknown')
+        try:
+            resource.post(request)
+            self.fail("Should raise FormError")
+        except FormError, e:
+            self.assertEqual(e.form.errors.keys(), ['character'])
+
+        request.data = dict(character='good')
+        try:
+            resource.post(request)
+            self.fail("Should raise FormError")
+        except FormError, e:
+            self.assertEqual(e.form.errors.keys(), ['name'])
+
+        request = RequestFactory().put('/')
+        request.data = dict(captain=True)
+        pirate = resource.put(request, pirate=pirate)
+        pirate = Pirate.objects.get(pk=pirate.pk)
+        self.assertTrue(pirate.captain)
+        self.assertEqual(pirate.name, 'John')
+
+        class PermissionResource(HandlerMixin, View):
+
+            class Meta:
+                allowed_methods = 'get', 'post'
+                model = 'auth.permission'
+                validator = True
+
+        permission = Permission.objects.all()[0]
+        request = RequestFactory().post('/')
+        request.data = dict(
+            name='Duplicate', codename=permission.codename,
+            content_type=permission.content_type_id)
+        try:
+            PermissionResource().post(request)
+            self.fail("Should raise FormError")
+        except FormError, e:
+            self.assertEqual(e.form.errors.keys(), ['__all__'])
+
+    def test_put_bulk(self):
+        from ..models import Pirate
+
+        pirates = mixer.cycle(3).blend('core.pirate', character='evil')
+
+        class Resource(HandlerMixin, View):
+
+            class Meta:
+                allowed_methods = 'get', 'put'
+                model = 'core.pirate'
+                bulk_update = True
+
+        request = RequestFactory().put('/')
+        request.data = dict(character='good')
+        resource = Resource()
+        resources = dict(pirate=Pirate.objects.filter(
+            pk__in=[p.pk for p in pirates]))
+
+        with self.assertNumQueries(2):
+            updated = resource.put(request, **resources)
+
+        self.assertEqual(len(updated), 3)
+        self.assertEqual([p.character for p in updated], ['good'] * 3)
+        self.assertEqual(Pirate.objects.filter(character='good').count(), 3)
+        self.assertEqual(
+            [p.name for p in Pirate.objects.order_by('pk')],
+            [p.name for p in pirates])
+
+        request.data = dict(character='unknown')
+        resources = dict(pirate=Pirate.objects.all())
+        self.assertRaises(FormError, resource.put, request, **resources)
+
+        # Unique fields are validated for every instance
+        class IslandResource(HandlerMixin, View):
+
+            class Meta:
+                allowed_methods = 'get', 'put'
+                model = 'core.island'
+                bulk_update = True
+
+        from ..models import Island
+        islands = mixer.cycle(2).blend('core.island')
+        request.data = dict(title='Tortuga')
+        self.assertRaises(FormError, IslandResource().put, request,
+                          island=Island.objects.all())
+
+        request.data = dict(title='Port Royal')
+        resources = dict(island=Island.objects.filter(pk=islands[1].pk))
+        with self.assertNumQueries(3):
+            updated = IslandResource().put(request, **resources)
+        self.assertEqual(updated[0].title, 'Port Royal')
+
+    def test_delete(self):
+        from ..models import Pirate
+
+        pirates = mixer.cycle(4).blend('core.pirate', character='evil')
+        mixer.blend('core.pirate', character='good')
+
+        response = self.delete_resource('pirate', data=dict(
+            pirate=[p.pk for p in pirates[:2]]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Pirate.objects.count(), 3)
+
+        response = self.client.delete(
+            self.reverse('pirate') + '?character=evil')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            list(Pirate.objects.values_list('character', flat=True)),
+            ['good'])
+
+        response = self.client.delete(
+            self.reverse('pirate') + '?character__megadeath=good')
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.delete(self.reverse('pirate'))
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(Pirate.objects.count(), 1)
+
+        class Resource(HandlerMixin, View):
+
+            class Meta:
+                allowed_methods = 'delete',
+                model = 'core.pirate'
+                bulk_delete_max = 2
+
+        mixer.cycle(2).blend('core.pirate', character='evil')
+        request = RequestFactory().delete('/')
+        resource = Resource()
+        try:
+            resource.delete(request, pirate=Pirate.objects.all())
+            self.fail("Should raise HttpError")
+        except HttpError, e:
+            self.assertEqual(e.status, 400)
+        self.assertEqual(Pirate.objects.count(), 3)
+
+        # Rights are checked for collections selected by filters
+        from adrest.utils.auth import AnonimousAuthenticator
+
+        class EvilAuthenticator(AnonimousAuthenticator):
+
+            @staticmethod
+            def test_rights(resources, request=None):
+                return not resources.get('pirate') or not resources[
+                    'pirate'].filter(character='good').exists()
+
+        class PirateResource(ResourceView):
+
+            class Meta:
+                allowed_methods = 'delete',
+                model = 'core.pirate'
+                authenticators = EvilAuthenticator
+
+        view = PirateResource.as_view()
+        response = view(RequestFactory().delete('/?character=good'))
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(Pirate.objects.count(), 3)
+
+        response = view(RequestFactory().delete('/?character=evil'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Pirate.objects.count(), 1)
+
+        # Lists of resources are deleted one by one
+        resource.delete(request, pirate=list(Pirate.objects.all()))
+        self.assertFalse(Pirate.objects.exists())
+
+    def test_conditional(self):
+        island = mixer.blend('core.island')
+        mixer.cycle(2).blend('core.treasure', island=island)
+
+        class TreasureResource(ResourceView):
+
+            class Meta:
+                model = 'core.treasure'
+                etag = True
+                last_modified = 'created_at'
+
+        view = TreasureResource.as_view()
+        rf = RequestFactory()
+
+        response = view(rf.get('/'))
+        self.assertEqual(response.status_code, 200)
+        etag, last_modified = response['ETag'], response['Last-Modified']
+
+        response = view(rf.get('/', HTTP_IF_NONE_MATCH=etag))
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        response = view(rf.get('/', HTTP_IF_MODIFIED_SINCE=last_modified))
+        self.assertEqual(response.status_code, 304)
+
+        treasure = mixer.blend('core.treasure', island=island)
+        response = view(rf.get('/', HTTP_IF_NONE_MATCH=etag))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+        response = view(rf.get('/'), treasure=treasure.pk)
+        self.assertEqual(response.status_code, 200)
+        response = view(
+            rf.get('/', HTTP_IF_NONE_MATCH=response['ETag']),
+            treasure=treasure.pk)
+        self.assertEqual(response.status_code, 304)
+
+    def test_head(self):
+        mixer.cycle(3).blend('core.pirate', character='good')
+
+        response = self.client.head(self.reverse('pirate'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Total-Count'], '3')
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertFalse(response.content)
+
+        response = self.client.head(
+            self.reverse('pirate') + '?character=evil')
+        self.assertEqual(response['X-Total-Count'], '0')
+
+        response = self.client.head(self.reverse('pirate', pirate=1))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('X-Total-Count'))
+
 
 # lint_ignore=F0401,C,E1103
@@ -1,7 +1,10 @@
+from django.test import RequestFactory
 from mixer.backend.django import mixer
 
 from ..api import api as API
 from adrest.tests import AdrestTestCase
+from adrest.utils.exceptions import HttpError
+from adrest.utils.throttle import CacheThrottle
 from adrest.views import ResourceView
 
 
@@ -29,6 +32,95 @@ class CoreResourceTest(AdrestTestCase):
         self.assertEqual(GammaResource._meta.name, 'gamma')
         self.assertEqual(GammaResource._meta.url_name, 'beta-gamma')
 
+    def test_stages(self):
+
+        class AlphaResource(ResourceView):
+            pass
+
+        self.assertFalse('throttle_check' in AlphaResource._meta.stages)
+        self.assertFalse('check_owners' in AlphaResource._meta.stages)
+        self.assertFalse('check_rights' in AlphaResource._meta.stages)
+        self.assertTrue('log_call' in AlphaResource._meta.stages)
+
+        class BetaResource(ResourceView):
+
+            class Meta:
+                parent = AlphaResource
+                throttle = CacheThrottle
+                log = False
+
+        self.assertTrue('throttle_check' in BetaResource._meta.stages)
+        self.assertTrue('check_owners' in BetaResource._meta.stages)
+        self.assertFalse('log_call' in BetaResource._meta.stages)
+
+        class GammaResource(BetaResource):
+
+            class Meta:
+                allow_public_access = True
+
+        self.assertFalse('check_owners' in GammaResource._meta.stages)
+
+        # Redefined hooks are never skipped
+        class DeltaResource(ResourceView):
+
+            def check_rights(self, resources, request=None):
+                raise HttpError("Access forbidden.", status=403)
+
+            def get(self, request, **resources):
+                return True
+
+        self.assertTrue('check_rights' in DeltaResource._meta.stages)
+        self.assertFalse('throttle_check' in DeltaResource._meta.stages)
+
+        response = DeltaResource.as_view()(RequestFactory().get('/'))
+        self.assertEqual(response.status_code, 403)
+
+    def test_server_timing(self):
+
+        class AlphaResource(ResourceView):
+
+            class Meta:
+                server_timing = True
+
+            def get(self, request, **resources):
+                return True
+
+        self.assertTrue('timing' in AlphaResource._meta.stages)
+
+        response = AlphaResource.as_view()(RequestFactory().get('/'))
+        stages = [
+            s.split(';')[0] for s in response['Server-Timing'].split(', ')]
+        self.assertEqual(stages, [
+            'authenticate', 'parse', 'get_resources', 'handle_request',
+            'transform', 'emit', 'log_call'])
+
+    def test_cache(self):
+
+        pirate = mixer.blend('core.pirate', name='Billy')
+
+        class AlphaResource(ResourceView):
+
+            class Meta:
+                model = 'core.pirate'
+                cache = 60
+                log = False
+
+        view = AlphaResource.as_view()
+        rf = RequestFactory()
+
+        response = view(rf.get('/'), pirate=pirate.pk)
+        self.assertContains(response, 'Billy')
+
+        with self.assertNumQueries(1):
+            cached = view(rf.get('/'), pirate=pirate.pk)
+        self.assertEqual(cached.content, response.content)
+        self.assertEqual(cached['Content-Type'], response['Content-Type'])
+
+        pirate.name = 'Bob'
+        pirate.save()
+        response = view(rf.get('/'), pirate=pirate.pk)
+        self.assertContains(response, 'Bob')
+
     def test_resources(self):
 
         pirate = mixer.blend('core.pirate')
@@ -142,6 +142,47 @@ class CoreTransformerTest(AdrestTestCase):
         self.assertTrue(result['fields']['boat_set'])
         self.assertEqual(len(list(result['fields']['boat_set'])), 2)
 
+    def test_values_serialization(self):
+        from adrest.utils.transformers import (
+            SmartTransformer, SmartDjangoTransformer)
+        from ..models import Treasure
+
+        island = mixer.blend('core.island')
+        mixer.cycle(2).blend('core.treasure', island=island)
+        mixer.blend('core.treasure', island=island,
+                    pirate=mixer.blend('core.pirate'))
+
+        class Resource(View, TransformerMixin):
+
+            class Meta:
+                model = 'core.treasure'
+
+        resource = Resource()
+        for cls in (SmartTransformer, SmartDjangoTransformer):
+            transformer = cls(resource, Treasure.objects.all())
+            self.assertTrue(transformer.get_values_fields(
+                transformer.value, **transformer.options))
+
+            with self.assertNumQueries(1):
+                result = transformer.transform()
+            self.assertEqual(
+                result, cls(resource, list(Treasure.objects.all())).transform())
+
+        class Resource(View, TransformerMixin):
+
+            class Meta:
+                model = 'core.treasure'
+
+            @staticmethod
+            def to_simple__island(treasure, transformer=None):
+                return treasure.island.title
+
+        resource = Resource()
+        transformer = SmartTransformer(resource, Treasure.objects.all())
+        self.assertFalse(transformer.get_values_fields(
+            transformer.value, **transformer.options))
+        self.assertEqual(transformer.transform()[0]['island'], island.title)
+
 
 
 # lint_ignore=W0212,E0102,C0110
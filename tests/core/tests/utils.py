@@ -15,6 +15,45 @@ class UtilsTests(TestCase):
         test = object()
         self.assertEqual(tools.as_tuple(test), (test,))
 
+    def test_executor(self):
+        from adrest.utils.deferred import Executor
+
+        results = []
+        executor = Executor()
+        self.assertFalse(executor.submit(results.append, 0))
+        self.assertEqual(results, [0])
+        self.assertFalse(executor.threads)
+
+        executor = Executor(workers=2, size=5, overflow='block')
+        for n in xrange(1, 10):
+            executor.submit(results.append, n)
+        executor.join()
+        self.assertEqual(len(executor.threads), 2)
+        self.assertEqual(sorted(results), range(10))
+
+        self.assertRaises(AssertionError, Executor, overflow='unknown')
+
+    def test_db_handler(self):
+        from django.http import HttpResponse
+        from adrest.utils.log_handlers import db_handler
+        from adrest.views import ResourceView
+
+        class LogResource(ResourceView):
+
+            class Meta:
+                log = True
+
+        request = AdrestRequestFactory().get('/log')
+        response = HttpResponse('content')
+        logs = []
+        db_handler(LogResource(), request=request, response=response,
+                   save=lambda **log: logs.append(log))
+
+        # Log data doesn't depend on later changes of the response
+        response.content = 'compressed'
+        self.assertEqual(logs[0]['response'], 'content')
+        self.assertEqual(logs[0]['uri'], '/log')
+
     def test_fix_request(self):
         rf = AdrestRequestFactory()
         request = rf.put('/test', {
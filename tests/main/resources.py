@@ -76,7 +76,7 @@ class CustomResource(ResourceView):
         emit_template = 'main/custom.xml'
 
     def get(self, request, **kwargs):
-        return list(self._meta.queryset)
+        return list(self.get_queryset())
 
     def post(self, request, **resources):
         try:
@@ -19,6 +19,7 @@ from adrest.mixin.transformer import TransformerMixin
 from adrest.models import Access
 from adrest.tests.utils import AdrestTestCase
 from adrest.utils import emitter, parser
+from adrest.utils.exceptions import HttpError
 
 
 class MixinTest(TestCase):
@@ -157,6 +158,46 @@ class AdrestTest(AdrestTestCase):
             book=self.book.pk, data=dict(author=self.author.pk))
         self.assertContains(response, 'true')
 
+        article = mixer.blend('main.article', book=self.book)
+        alien = mixer.blend('main.article')
+        resource = ArticleResource()
+        request = RequestFactory().get('/')
+
+        with self.assertNumQueries(0):
+            self.assertTrue(resource.check_owners(
+                request, author=self.author, book=self.book, article=article))
+
+        with self.assertNumQueries(1):
+            self.assertTrue(resource.check_owners(
+                request, author=self.author.pk, book=self.book.pk,
+                article=article.pk))
+
+        resources = resource.get_resources(
+            request, author=str(self.author.pk), book=str(self.book.pk),
+            article=str(article.pk))
+        self.assertEqual(resources['book'], self.book)
+        self.assertEqual(resources['author'], self.author)
+        with self.assertNumQueries(1):
+            resources = resource.get_resources(
+                request, author=str(self.author.pk), book=str(self.book.pk),
+                article=str(article.pk))
+            self.assertEqual(resources['article'], article)
+            self.assertEqual(resources['author'].name, self.author.name)
+            resource.check_owners(request, **resources)
+
+        resources = resource.get_resources(
+            request, author=str(self.author.pk), book=str(self.book.pk),
+            article=str(alien.pk))
+        self.assertEqual(resources['article'], alien)
+
+        for resources in (
+                dict(author=self.author, book=self.book, article=alien),
+                dict(author=alien.book.author, book=self.book,
+                     article=article),
+                dict(book=self.book, article=article)):
+            self.assertRaises(
+                HttpError, resource.check_owners, request, **resources)
+
     def test_access_logging(self):
         uri = self.reverse('author-test-book-article', book=self.book.pk)
         self.client.get(uri)
@@ -249,11 +290,16 @@ class ResourceTest(AdrestTestCase):
 
         response = self.get_resource('author-test-book', data=dict(
             title__startswith="book1",
-            title__megadeath=12,
         ))
         self.assertContains(response, 'count="%s"' % Book.objects.filter(
             title__startswith='book1').count())
 
+        response = self.get_resource('author-test-book', data=dict(
+            title__startswith="book1",
+            title__megadeath=12,
+        ))
+        self.assertEqual(response.status_code, 400)
+
         response = self.post_resource('author-test-book', data=dict(
             title="new book",
             status=2,